@@ -0,0 +1,153 @@
+"""Write identical pixels to both GC9A01 panels in one SPI transfer.
+
+Both eye displays share the SPI bus and only differ in their CS and DC pins.
+BroadcastDisplay drives all of them together and sends the panel's memory
+write commands itself, so every byte on the bus lands in both panels at once.
+It implements the drawing calls the eyes use (fill, fill_rect, hline, vline,
+pixel, fill_circle, blit_buffer). The panels must already have been
+initialised through their own gc9a01.GC9A01 objects.
+
+Opening a window takes three commands, each with its own DC switch, so a
+broadcast costs more calls than a driver write. Writes smaller than
+min_pixels, and fill_circle (many short lines), are therefore passed to
+each panel's own gc9a01.GC9A01 when those are given as panels; only large
+fills and blits go to both panels at once.
+"""
+
+import framebuf
+from canvas import swap565
+
+_CASET = b"\x2a"
+_RASET = b"\x2b"
+_RAMWR = b"\x2c"
+
+FILL_LINES = 4   # Rows of solid color written per SPI call by fill_rect
+MIN_PIXELS = 256  # Smaller writes go to each panel separately
+
+
+class BroadcastDisplay:
+    def __init__(self, spi, cs_pins, dc_pins, width, height, panels=(), min_pixels=MIN_PIXELS):
+        self.spi = spi
+        self.cs_pins = cs_pins
+        self.dc_pins = dc_pins
+        self.panels = panels
+        self.min_pixels = min_pixels if panels else 0
+        self._width = width
+        self._height = height
+        self._window = bytearray(4)
+        self._fill_buf = bytearray(width * FILL_LINES * 2)
+        self._fill_fb = framebuf.FrameBuffer(self._fill_buf, width * FILL_LINES, 1, framebuf.RGB565)
+        self._fill_color = None
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def _command(self, cmd, data=None):
+        for dc in self.dc_pins:
+            dc.value(0)
+        self.spi.write(cmd)
+        if data is not None:
+            for dc in self.dc_pins:
+                dc.value(1)
+            self.spi.write(data)
+
+    def _begin(self, x0, y0, x1, y1):
+        # Select both panels and open a memory write for the window.
+        for cs in self.cs_pins:
+            cs.value(0)
+        w = self._window
+        w[0] = x0 >> 8
+        w[1] = x0 & 0xFF
+        w[2] = x1 >> 8
+        w[3] = x1 & 0xFF
+        self._command(_CASET, w)
+        w[0] = y0 >> 8
+        w[1] = y0 & 0xFF
+        w[2] = y1 >> 8
+        w[3] = y1 & 0xFF
+        self._command(_RASET, w)
+        self._command(_RAMWR)
+        for dc in self.dc_pins:
+            dc.value(1)
+
+    def _end(self):
+        for cs in self.cs_pins:
+            cs.value(1)
+
+    def fill_rect(self, x, y, w, h, color):
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        w = min(w, self._width - x)
+        h = min(h, self._height - y)
+        if w <= 0 or h <= 0:
+            return
+        if w * h < self.min_pixels:
+            for panel in self.panels:
+                panel.fill_rect(x, y, w, h, color)
+            return
+        if color != self._fill_color:
+            self._fill_fb.fill(swap565(color))
+            self._fill_color = color
+        self._begin(x, y, x + w - 1, y + h - 1)
+        remaining = w * h * 2
+        chunk = memoryview(self._fill_buf)
+        size = len(self._fill_buf)
+        while remaining > 0:
+            n = min(size, remaining)
+            self.spi.write(chunk[:n])
+            remaining -= n
+        self._end()
+
+    def fill(self, color):
+        self.fill_rect(0, 0, self._width, self._height, color)
+
+    def hline(self, x, y, w, color):
+        self.fill_rect(x, y, w, 1, color)
+
+    def vline(self, x, y, h, color):
+        self.fill_rect(x, y, 1, h, color)
+
+    def pixel(self, x, y, color):
+        self.fill_rect(x, y, 1, 1, color)
+
+    def fill_circle(self, x0, y0, r, color):
+        if self.panels:
+            for panel in self.panels:
+                panel.fill_circle(x0, y0, r, color)
+            return
+        # Same midpoint algorithm as the gc9a01 driver.
+        vline = self.vline
+        f = 1 - r
+        ddf_x = 1
+        ddf_y = -2 * r
+        x = 0
+        y = r
+        vline(x0, y0 - r, 2 * r + 1, color)
+        while x < y:
+            if f >= 0:
+                y -= 1
+                ddf_y += 2
+                f += ddf_y
+            x += 1
+            ddf_x += 2
+            f += ddf_x
+            vline(x0 + x, y0 - y, 2 * y + 1, color)
+            vline(x0 + y, y0 - x, 2 * x + 1, color)
+            vline(x0 - x, y0 - y, 2 * y + 1, color)
+            vline(x0 - y, y0 - x, 2 * x + 1, color)
+
+    def blit_buffer(self, buffer, x, y, w, h):
+        if w * h < self.min_pixels:
+            for panel in self.panels:
+                panel.blit_buffer(buffer, x, y, w, h)
+            return
+        self._begin(x, y, x + w - 1, y + h - 1)
+        self.spi.write(buffer)
+        self._end()
@@ -0,0 +1,135 @@
+"""RGB565 drawing surface for off-screen rendering.
+
+A Canvas exposes the same drawing calls as gc9a01.GC9A01 (fill, fill_rect,
+hline, vline, pixel, fill_circle, blit_buffer), so the eye drawing functions
+can render into RAM instead of straight to a panel. Pixels are stored
+big-endian, exactly as the panel expects them, so the buffer can be handed to
+tft.blit_buffer() unchanged.
+
+The canvas has an origin (x, y): drawing calls use screen coordinates and are
+translated and clipped to the canvas area.
+
+An IndexCanvas takes the same calls but stores a 4-bit palette index per
+pixel instead of a color. Canvas.recolor() turns it into colors through a
+palette, so one drawing can be shown in any color scheme without drawing
+it again.
+"""
+
+import framebuf
+from array import array
+
+
+def swap565(color):
+    """Byte-swap an RGB565 color for framebuf's little-endian storage."""
+    return ((color & 0xFF) << 8) | (color >> 8)
+
+
+def _index(color):
+    return color
+
+
+def palette(colors):
+    """framebuf palette mapping index i to colors[i], for Canvas.recolor()."""
+    pal = framebuf.FrameBuffer(bytearray(2 * len(colors)), len(colors), 1, framebuf.RGB565)
+    for i, color in enumerate(colors):
+        pal.pixel(i, 0, swap565(color))
+    return pal
+
+
+class Canvas:
+    def __init__(self, width, height, x=0, y=0, buffer=None):
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        if buffer is None:
+            buffer = bytearray(width * height * 2)
+        self.buffer = buffer
+        self._fb = framebuf.FrameBuffer(buffer, width, height, framebuf.RGB565)
+        self._color = swap565
+
+    def fill(self, color):
+        self._fb.fill(self._color(color))
+
+    def fill_rect(self, x, y, w, h, color):
+        self._fb.fill_rect(x - self.x, y - self.y, w, h, self._color(color))
+
+    def hline(self, x, y, w, color):
+        self._fb.hline(x - self.x, y - self.y, w, self._color(color))
+
+    def vline(self, x, y, h, color):
+        self._fb.vline(x - self.x, y - self.y, h, self._color(color))
+
+    def pixel(self, x, y, color):
+        self._fb.pixel(x - self.x, y - self.y, self._color(color))
+
+    def fill_circle(self, x0, y0, r, color):
+        # Same midpoint algorithm as the gc9a01 driver, so canvas and panel
+        # output are pixel-identical.
+        fb = self._fb
+        color = self._color(color)
+        x0 -= self.x
+        y0 -= self.y
+        f = 1 - r
+        ddf_x = 1
+        ddf_y = -2 * r
+        x = 0
+        y = r
+        fb.vline(x0, y0 - r, 2 * r + 1, color)
+        while x < y:
+            if f >= 0:
+                y -= 1
+                ddf_y += 2
+                f += ddf_y
+            x += 1
+            ddf_x += 2
+            f += ddf_x
+            fb.vline(x0 + x, y0 - y, 2 * y + 1, color)
+            fb.vline(x0 + y, y0 - x, 2 * x + 1, color)
+            fb.vline(x0 - x, y0 - y, 2 * y + 1, color)
+            fb.vline(x0 - y, y0 - x, 2 * x + 1, color)
+
+    def blit_buffer(self, buffer, x, y, w, h):
+        src = framebuf.FrameBuffer(buffer, w, h, framebuf.RGB565)
+        self._fb.blit(src, x - self.x, y - self.y)
+
+    def recolor(self, index, palette):
+        """Fill the canvas from an IndexCanvas of the same size through palette."""
+        self._fb.blit(index._fb, 0, 0, -1, palette)
+
+
+class IndexCanvas(Canvas):
+    """
+    Canvas of 4-bit palette indexes (0..15). Drawing calls take an index
+    where Canvas takes a color.
+    """
+
+    def __init__(self, width, height, x=0, y=0):
+        self.width = width
+        self.height = height
+        self.x = x
+        self.y = y
+        self.buffer = bytearray((width + 1) // 2 * height)
+        self._fb = framebuf.FrameBuffer(self.buffer, width, height, framebuf.GS4_HMSB)
+        self._color = _index
+
+    def row_spans(self, background):
+        """
+        Return array('h') of (start, stop) column pairs per row bounding every
+        pixel that differs from the background index. Empty rows get (0, 0).
+        """
+        spans = array("h", bytes(4 * self.height))
+        fb = self._fb
+        w = self.width
+        for row in range(self.height):
+            start = 0
+            while start < w and fb.pixel(start, row) == background:
+                start += 1
+            if start == w:
+                continue
+            stop = w
+            while fb.pixel(stop - 1, row) == background:
+                stop -= 1
+            spans[2 * row] = start
+            spans[2 * row + 1] = stop
+        return spans
@@ -0,0 +1,165 @@
+"""Run the panel drawing calls on the second RP2350 core.
+
+Core1Renderer keeps a ring of drawing commands in RAM. display(tft) returns
+a RemoteDisplay: it offers the drawing calls of gc9a01.GC9A01 (fill,
+fill_rect, hline, vline, pixel, fill_circle, blit_buffer), but each call only
+appends a command to the ring and returns. A thread on core 1 takes the
+commands in order and makes the real calls, so the SPI transfers and the
+driver's rasterization no longer hold up the uasyncio loop on core 0.
+
+The ring has one writer (core 0) and one reader (core 1) and needs no lock:
+each side only ever moves its own index, and the writer fills a slot before
+publishing it. The ring holds a whole animation frame (bench.py counts at
+most about 420 calls per frame for both eyes), and the eyes await wait()
+after every frame, which yields to the other tasks. Only a frame larger
+than the ring makes core 0 wait for a free slot without yielding. Core 1
+idles (machine.idle(), woken by the next event) while the ring is empty.
+
+A buffer given to blit_buffer() is read later, on core 1: it must not change
+until wait() says the queue is empty. All displays of one renderer share the
+ring, so their calls reach the SPI bus in the order they were made.
+"""
+
+import _thread
+import machine
+import uasyncio as asyncio
+from array import array
+
+QUEUE_SLOTS = 512   # Commands queued before the caller waits for core 1 (28 bytes each)
+
+_FILL = 0
+_FILL_RECT = 1
+_HLINE = 2
+_VLINE = 3
+_PIXEL = 4
+_FILL_CIRCLE = 5
+_BLIT_BUFFER = 6
+
+_WORDS = 7   # op, display, up to five int arguments
+_HEAD = 0    # Next slot the writer fills (written by core 0 only)
+_TAIL = 1    # Next slot the reader takes (written by core 1 only)
+
+
+class Core1Renderer:
+    def __init__(self, slots=QUEUE_SLOTS):
+        self.slots = slots
+        self._queue = array("i", bytes(4 * _WORDS * slots))
+        self._buffers = [None] * slots
+        self._index = array("I", (0, 0))
+        self._displays = []
+        self.running = False
+
+    def display(self, tft):
+        """Return a RemoteDisplay that draws on tft from core 1."""
+        self._displays.append(tft)
+        return RemoteDisplay(self, len(self._displays) - 1, tft)
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            _thread.start_new_thread(self._run, ())
+
+    def stop(self):
+        # Core 1 finishes the queued commands first.
+        self.wait_blocking()
+        self.running = False
+
+    def wait_blocking(self):
+        while self.running and self._index[_HEAD] != self._index[_TAIL]:
+            pass
+
+    async def wait(self):
+        while self.running and self._index[_HEAD] != self._index[_TAIL]:
+            await asyncio.sleep_ms(0)
+
+    def push(self, op, display, a=0, b=0, c=0, d=0, e=0, buffer=None):
+        index = self._index
+        head = index[_HEAD]
+        following = head + 1
+        if following == self.slots:
+            following = 0
+        while following == index[_TAIL]:
+            pass
+        q = self._queue
+        o = head * _WORDS
+        q[o] = op
+        q[o + 1] = display
+        q[o + 2] = a
+        q[o + 3] = b
+        q[o + 4] = c
+        q[o + 5] = d
+        q[o + 6] = e
+        self._buffers[head] = buffer
+        # Publish the slot only once it is complete.
+        index[_HEAD] = following
+
+    def _run(self):
+        q = self._queue
+        buffers = self._buffers
+        displays = self._displays
+        index = self._index
+        slots = self.slots
+        idle = machine.idle
+        while self.running:
+            tail = index[_TAIL]
+            if tail == index[_HEAD]:
+                idle()
+                continue
+            o = tail * _WORDS
+            op = q[o]
+            tft = displays[q[o + 1]]
+            try:
+                if op == _FILL_RECT:
+                    tft.fill_rect(q[o + 2], q[o + 3], q[o + 4], q[o + 5], q[o + 6])
+                elif op == _BLIT_BUFFER:
+                    tft.blit_buffer(buffers[tail], q[o + 2], q[o + 3], q[o + 4], q[o + 5])
+                elif op == _FILL_CIRCLE:
+                    tft.fill_circle(q[o + 2], q[o + 3], q[o + 4], q[o + 5])
+                elif op == _HLINE:
+                    tft.hline(q[o + 2], q[o + 3], q[o + 4], q[o + 5])
+                elif op == _VLINE:
+                    tft.vline(q[o + 2], q[o + 3], q[o + 4], q[o + 5])
+                elif op == _PIXEL:
+                    tft.pixel(q[o + 2], q[o + 3], q[o + 4])
+                elif op == _FILL:
+                    tft.fill(q[o + 2])
+            except Exception as e:
+                print("Core 1 render error:", e)
+            buffers[tail] = None
+            tail += 1
+            if tail == slots:
+                tail = 0
+            index[_TAIL] = tail
+
+
+class RemoteDisplay:
+    # Any other attribute (init, width, ...) is used directly on core 0; only
+    # do that while the renderer is idle.
+    def __init__(self, renderer, display, tft):
+        self._push = renderer.push
+        self._display = display
+        self._tft = tft
+
+    def __getattr__(self, name):
+        return getattr(self._tft, name)
+
+    def fill(self, color):
+        self._push(_FILL, self._display, color)
+
+    def fill_rect(self, x, y, w, h, color):
+        self._push(_FILL_RECT, self._display, x, y, w, h, color)
+
+    def hline(self, x, y, w, color):
+        self._push(_HLINE, self._display, x, y, w, color)
+
+    def vline(self, x, y, h, color):
+        self._push(_VLINE, self._display, x, y, h, color)
+
+    def pixel(self, x, y, color):
+        self._push(_PIXEL, self._display, x, y, color)
+
+    def fill_circle(self, x, y, r, color):
+        self._push(_FILL_CIRCLE, self._display, x, y, r, color)
+
+    def blit_buffer(self, buffer, x, y, w, h):
+        self._push(_BLIT_BUFFER, self._display, x, y, w, h, buffer=buffer)
@@ -0,0 +1,167 @@
+"""DMA-driven panel updates so rendering overlaps the SPI transfer.
+
+PipelinedDisplay is a FramebufferDisplay with a second, scan-out buffer.
+show() copies the changed rows into the scan-out buffer and hands them to
+DMA, then returns straight away: the next frame is rendered into the canvas
+while the previous one is still streaming to the panel. Awaiting ready()
+yields to the event loop until the transfer has finished.
+
+Both panels share one SPI bus, so they share one DmaLink. Any direct call on
+the underlying gc9a01 driver first waits for a running transfer to finish.
+
+Register addresses and the DREQ number are for SPI1 on the RP2350 (Pico 2).
+Without the rp2 module the link falls back to blocking spi.write() calls.
+"""
+
+import uasyncio as asyncio
+from framebuffer_display import FramebufferDisplay
+
+try:
+    import rp2
+    from machine import mem32
+except ImportError:
+    rp2 = None
+
+SPI1_BASE    = 0x40088000
+SSPDR        = 0x008
+SSPSR        = 0x00C
+SSPICR       = 0x020
+SSPDMACR     = 0x024
+SSPSR_RNE    = 0x04
+SSPSR_BSY    = 0x10
+SSPICR_RORIC = 0x01
+SSPDMACR_TXDMAE = 0x02
+DREQ_SPI1_TX = 26   # 18 on the RP2040
+
+_CASET = b"\x2a"
+_RASET = b"\x2b"
+_RAMWR = b"\x2c"
+
+
+class DmaLink:
+    def __init__(self, spi, spi_base=SPI1_BASE, dreq=DREQ_SPI1_TX):
+        self.spi = spi
+        self._base = spi_base
+        self._window = bytearray(4)
+        self._cs_pins = None   # Panels selected by the running transfer
+        self._dma = None
+        if rp2 is not None:
+            self._dma = rp2.DMA()
+            self._ctrl = self._dma.pack_ctrl(size=0, inc_write=False, treq_sel=dreq, irq_quiet=False)
+            self._done = asyncio.ThreadSafeFlag()
+            self._dma.irq(self._on_done)
+
+    def _on_done(self, dma):
+        self._done.set()
+
+    def _command(self, dc_pins, cmd, data=None):
+        for dc in dc_pins:
+            dc.value(0)
+        self.spi.write(cmd)
+        if data is not None:
+            for dc in dc_pins:
+                dc.value(1)
+            self.spi.write(data)
+
+    def _set_window(self, dc_pins, x0, y0, x1, y1):
+        w = self._window
+        w[0] = x0 >> 8
+        w[1] = x0 & 0xFF
+        w[2] = x1 >> 8
+        w[3] = x1 & 0xFF
+        self._command(dc_pins, _CASET, w)
+        w[0] = y0 >> 8
+        w[1] = y0 & 0xFF
+        w[2] = y1 >> 8
+        w[3] = y1 & 0xFF
+        self._command(dc_pins, _RASET, w)
+        self._command(dc_pins, _RAMWR)
+        for dc in dc_pins:
+            dc.value(1)
+
+    def start(self, cs_pins, dc_pins, buffer, x, y, w, h):
+        # Open a memory write on the selected panels and stream buffer to it.
+        self.wait_blocking()
+        for cs in cs_pins:
+            cs.value(0)
+        self._set_window(dc_pins, x, y, x + w - 1, y + h - 1)
+        if self._dma is None:
+            self.spi.write(buffer)
+            for cs in cs_pins:
+                cs.value(1)
+            return
+        self._cs_pins = cs_pins
+        mem32[self._base + SSPDMACR] |= SSPDMACR_TXDMAE
+        self._dma.config(read=buffer, write=self._base + SSPDR, count=len(buffer),
+                         ctrl=self._ctrl, trigger=True)
+
+    def _finish(self):
+        base = self._base
+        while mem32[base + SSPSR] & SSPSR_BSY:
+            pass
+        # Nothing reads the RX FIFO during DMA: drain it and clear the overrun.
+        while mem32[base + SSPSR] & SSPSR_RNE:
+            mem32[base + SSPDR]
+        mem32[base + SSPICR] = SSPICR_RORIC
+        mem32[base + SSPDMACR] &= ~SSPDMACR_TXDMAE
+        for cs in self._cs_pins:
+            cs.value(1)
+        self._cs_pins = None
+
+    def wait_blocking(self):
+        if self._cs_pins is None:
+            return
+        while self._dma.active():
+            pass
+        self._finish()
+
+    async def wait(self):
+        if self._cs_pins is None:
+            return
+        while self._dma.active():
+            await self._done.wait()
+        self._finish()
+
+
+class _SyncedPanel:
+    # Waits for the DMA transfer before any direct use of the panel driver.
+    def __init__(self, tft, link):
+        self._tft = tft
+        self._link = link
+
+    def __getattr__(self, name):
+        self._link.wait_blocking()
+        return getattr(self._tft, name)
+
+
+class PipelinedDisplay(FramebufferDisplay):
+    def __init__(self, tft, x, y, width, height, link, cs_pins, dc_pins):
+        super().__init__(_SyncedPanel(tft, link), x, y, width, height)
+        self.link = link
+        self.cs_pins = cs_pins
+        self.dc_pins = dc_pins
+        self._scanout = bytearray(len(self.canvas.buffer))
+
+    async def ready(self):
+        await self.link.wait()
+
+    def show(self, target=None):
+        """
+        Start sending the changed rows of the region by DMA, to this panel or
+        to every panel of target (e.g. a BroadcastDisplay).
+        """
+        top = self._dirty_top
+        bottom = self._dirty_bottom
+        if top >= bottom:
+            return
+        c = self.canvas
+        row_bytes = c.width * 2
+        start = top * row_bytes
+        end = bottom * row_bytes
+        self.link.wait_blocking()
+        scanout = memoryview(self._scanout)[start:end]
+        scanout[:] = memoryview(c.buffer)[start:end]
+        panel = target or self
+        self.link.start(panel.cs_pins, panel.dc_pins, scanout,
+                        c.x, c.y + top, c.width, bottom - top)
+        self.discard()
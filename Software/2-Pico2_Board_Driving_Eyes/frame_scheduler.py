@@ -0,0 +1,77 @@
+"""Fixed-rate frame pacing for the eye animation.
+
+Call begin() before drawing a frame and end(key) after presenting it.
+end() returns how many milliseconds are left of the frame budget, for the
+caller to await asyncio.sleep_ms() (a plain call, so the frame loop does not
+allocate a coroutine per frame). When drawing took longer than one frame,
+dropped holds how many whole frames were lost, so the caller can skip that
+many interpolation steps and stay on time.
+
+Statistics are kept per key (the eyesMode) and printed by report().
+"""
+
+import time
+
+_FRAMES = 0
+_OVERRUNS = 1
+_RENDER_US = 2
+_MAX_RENDER_US = 3
+_FRAME_US = 4
+
+
+class FrameScheduler:
+    def __init__(self, fps):
+        self.set_fps(fps)
+        self.stats = {}   # key -> [frames, overruns, render_us, max_render_us, frame_us]
+        self._frame_start = time.ticks_us()
+        self._last_end = None
+        self.dropped = 0         # Whole frames lost by the last frame
+        self.recorder = None   # Optional profiler timer fed every frame's render time
+
+    def set_fps(self, fps):
+        self.fps = fps
+        self.period_us = 1000000 // fps
+
+    def begin(self):
+        self._frame_start = time.ticks_us()
+        if self._last_end is None:
+            self._last_end = self._frame_start
+
+    def idle(self):
+        # Call between movements so pauses do not count as frame time.
+        self._last_end = None
+
+    def end(self, key):
+        now = time.ticks_us()
+        render_us = time.ticks_diff(now, self._frame_start)
+        remaining = self.period_us - render_us
+        self.dropped = 0 if remaining > 0 else -remaining // self.period_us
+
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = [0, 0, 0, 0, 0]
+        delay_ms = remaining // 1000 if remaining > 0 else 0
+        # The frame lasts until the end of the sleep the caller takes next.
+        end = time.ticks_add(now, delay_ms * 1000)
+        stats[_FRAMES] += 1
+        stats[_RENDER_US] += render_us
+        stats[_FRAME_US] += time.ticks_diff(end, self._last_end)
+        if render_us > stats[_MAX_RENDER_US]:
+            stats[_MAX_RENDER_US] = render_us
+        if remaining <= 0:
+            stats[_OVERRUNS] += 1
+        self._last_end = end
+        if self.recorder is not None:
+            self.recorder.record(render_us)
+        return delay_ms
+
+    def report(self):
+        print("Frame stats (target {} fps):".format(self.fps))
+        for key in sorted(self.stats):
+            frames, overruns, render_us, max_render_us, frame_us = self.stats[key]
+            fps = frames * 1000000 / frame_us if frame_us else 0
+            print("  {}: {} frames, {:.1f} fps, render avg {:.1f} ms max {:.1f} ms, {} overruns".format(
+                key, frames, fps, render_us / frames / 1000, max_render_us / 1000, overruns))
+
+    def reset(self):
+        self.stats = {}
@@ -0,0 +1,136 @@
+"""Off-screen framebuffer front end for a GC9A01 panel.
+
+FramebufferDisplay offers the same drawing calls as gc9a01.GC9A01, but
+everything that lands inside the active eye region is composed in an RGB565
+Canvas in RAM. Calling show() pushes the changed rows of that region to the
+panel with a single blit_buffer. Drawing outside the region still goes
+straight to the panel, so the final picture is the same as direct drawing;
+only the number of SPI transactions changes.
+
+A 150x150 region costs 45 KB of RAM per display.
+"""
+
+from canvas import Canvas
+
+
+class FramebufferDisplay:
+    def __init__(self, tft, x, y, width, height):
+        self.tft = tft
+        self.canvas = Canvas(width, height, x, y)
+        self._x1 = x + width
+        self._y1 = y + height
+        self._dirty_top = height
+        self._dirty_bottom = 0
+
+    def init(self):
+        self.tft.init()
+
+    def width(self):
+        return self.tft.width()
+
+    def height(self):
+        return self.tft.height()
+
+    def _mark(self, y, h):
+        top = max(0, y - self.canvas.y)
+        bottom = min(self.canvas.height, y + h - self.canvas.y)
+        if top < self._dirty_top:
+            self._dirty_top = top
+        if bottom > self._dirty_bottom:
+            self._dirty_bottom = bottom
+
+    def _inside(self, x, y, w, h):
+        c = self.canvas
+        return x >= c.x and y >= c.y and x + w <= self._x1 and y + h <= self._y1
+
+    def _outside(self, x, y, w, h):
+        c = self.canvas
+        return x >= self._x1 or y >= self._y1 or x + w <= c.x or y + h <= c.y
+
+    def fill_rect(self, x, y, w, h, color):
+        if w <= 0 or h <= 0:
+            return
+        if self._outside(x, y, w, h):
+            self.tft.fill_rect(x, y, w, h, color)
+            return
+        c = self.canvas
+        c.fill_rect(x, y, w, h, color)
+        self._mark(y, h)
+        if self._inside(x, y, w, h):
+            return
+        # Send the parts around the region straight to the panel.
+        tft = self.tft
+        x1 = x + w
+        y1 = y + h
+        if y < c.y:
+            tft.fill_rect(x, y, w, c.y - y, color)
+        if y1 > self._y1:
+            tft.fill_rect(x, self._y1, w, y1 - self._y1, color)
+        top = max(y, c.y)
+        height = min(y1, self._y1) - top
+        if x < c.x:
+            tft.fill_rect(x, top, c.x - x, height, color)
+        if x1 > self._x1:
+            tft.fill_rect(self._x1, top, x1 - self._x1, height, color)
+
+    def fill(self, color):
+        self.fill_rect(0, 0, self.tft.width(), self.tft.height(), color)
+
+    def hline(self, x, y, w, color):
+        self.fill_rect(x, y, w, 1, color)
+
+    def vline(self, x, y, h, color):
+        self.fill_rect(x, y, 1, h, color)
+
+    def pixel(self, x, y, color):
+        self.fill_rect(x, y, 1, 1, color)
+
+    def fill_circle(self, x0, y0, r, color):
+        size = 2 * r + 1
+        if self._outside(x0 - r, y0 - r, size, size):
+            self.tft.fill_circle(x0, y0, r, color)
+            return
+        self.canvas.fill_circle(x0, y0, r, color)
+        self._mark(y0 - r, size)
+        if not self._inside(x0 - r, y0 - r, size, size):
+            # The region part is sent again by show(), with anything drawn on top.
+            self.tft.fill_circle(x0, y0, r, color)
+
+    def blit_buffer(self, buffer, x, y, w, h):
+        if self._outside(x, y, w, h):
+            self.tft.blit_buffer(buffer, x, y, w, h)
+            return
+        self.canvas.blit_buffer(buffer, x, y, w, h)
+        self._mark(y, h)
+        if not self._inside(x, y, w, h):
+            self.tft.blit_buffer(buffer, x, y, w, h)
+
+    def show(self, target=None):
+        """
+        Push the rows of the region that changed since the last show(), to
+        the panel or to another display such as a BroadcastDisplay.
+        """
+        top = self._dirty_top
+        bottom = self._dirty_bottom
+        if top >= bottom:
+            return
+        c = self.canvas
+        row_bytes = c.width * 2
+        (target or self.tft).blit_buffer(memoryview(c.buffer)[top * row_bytes:bottom * row_bytes],
+                                         c.x, c.y + top, c.width, bottom - top)
+        self.discard()
+
+    def pending(self):
+        # True when show() has rows to send.
+        return self._dirty_top < self._dirty_bottom
+
+    def discard(self):
+        # Forget pending changes, e.g. after another display pushed them.
+        self._dirty_top = self.canvas.height
+        self._dirty_bottom = 0
+
+    def same_frame(self, other):
+        # True when show() would send exactly what other.show() sends.
+        return (self._dirty_top == other._dirty_top
+                and self._dirty_bottom == other._dirty_bottom
+                and self.canvas.buffer == other.canvas.buffer)
@@ -0,0 +1,111 @@
+"""Compiled bitmap glyphs for the icon eyes ($, heart, bat).
+
+A glyph is defined by its rows of "0"/"1" characters (commas are ignored).
+At import time each row is bit-packed and turned into horizontal runs of set
+pixels; runs that repeat on consecutive rows are merged into one rectangle.
+draw_glyph() then issues a single fill_rect per rectangle instead of one call
+per scaled pixel.
+
+To add an icon eye, define a Glyph here and map it to a new eyesMode in
+ICON_GLYPHS in main.py.
+"""
+
+from array import array
+
+
+class Glyph:
+    def __init__(self, rows, divisor, centre_pixels=False):
+        rows = [row.replace(",", "") for row in rows]
+        self.width = len(rows[0])
+        self.height = len(rows)
+        self.divisor = divisor              # scale = iris_r // divisor
+        self.centre_pixels = centre_pixels  # Centre on scaled pixels, not on cells
+
+        # Bit-packed rows, leftmost column in the highest bit.
+        self.bits = array("I", [int(row, 2) for row in rows])
+
+        # Rectangles as flat (col, row, width, height) quadruples, in cells.
+        rects = []
+        open_runs = {}
+        for y in range(self.height):
+            runs = {}
+            bits = self.bits[y]
+            x = 0
+            while x < self.width:
+                if bits >> (self.width - 1 - x) & 1:
+                    start = x
+                    while x < self.width and bits >> (self.width - 1 - x) & 1:
+                        x += 1
+                    key = (start, x - start)
+                    rect = open_runs.get(key)
+                    if rect is None:
+                        rect = [start, y, x - start, 0]
+                        rects.append(rect)
+                    rect[3] += 1
+                    runs[key] = rect
+                else:
+                    x += 1
+            open_runs = runs
+        self.rects = array("B", [v for rect in rects for v in rect])
+
+    def scale(self, iris_r):
+        return max(1, iris_r // self.divisor)
+
+    def origin(self, scale):
+        # Offset of the glyph's top-left corner from its centre point.
+        if self.centre_pixels:
+            return (self.width * scale) // 2, (self.height * scale) // 2
+        return (self.width // 2) * scale, (self.height // 2) * scale
+
+    def half_extent(self, scale):
+        # Largest distance from the centre point that the glyph covers.
+        ox, oy = self.origin(scale)
+        return max(ox, oy, self.width * scale - ox, self.height * scale - oy)
+
+
+def draw_glyph(tft, glyph, cx, cy, scale, color):
+    ox, oy = glyph.origin(scale)
+    x0 = cx - ox
+    y0 = cy - oy
+    rects = glyph.rects
+    for i in range(0, len(rects), 4):
+        tft.fill_rect(x0 + rects[i] * scale, y0 + rects[i + 1] * scale,
+                      rects[i + 2] * scale, rects[i + 3] * scale, color)
+
+
+# ----- GLYPH DEFINITIONS -----
+DOLLAR = Glyph([
+    "00100",
+    "01111",
+    "10000",
+    "10000",
+    "01110",
+    "00001",
+    "00001",
+    "11110",
+    "00100"
+], divisor=4)
+
+HEART = Glyph([
+    "001110011100",
+    "011111111110",
+    "111111111111",
+    "111111111111",
+    "111111111111",
+    "111111111111",
+    "011111111110",
+    "001111111100",
+    "000111111000",
+    "000011110000",
+    "000001100000"
+], divisor=6, centre_pixels=True)
+
+BAT = Glyph([
+    "1,1,0,0,0,0,0,0,0,0,0,1,1",
+    "0,1,1,0,0,1,0,1,0,0,1,1,0",
+    "0,0,1,1,0,1,1,1,0,1,1,0,0",
+    "0,0,0,1,1,1,1,1,1,1,0,0,0",
+    "0,0,0,1,1,1,1,1,1,1,0,0,0",
+    "0,0,0,0,1,1,1,1,1,0,0,0,0",
+    "0,0,0,0,0,0,1,0,0,0,0,0,0",
+], divisor=6)
@@ -0,0 +1,53 @@
+"""Garbage collection at chosen moments, with heap statistics.
+
+The animation loop allocates little: a movement's iris sprites are rendered
+before its first frame, and with the panels drawn directly a frame allocates
+nothing unless a sprite did not fit in the cache. The framebuffer and core 1
+paths await present(), one coroutine per frame. So the heap only fills up
+slowly. collect() runs the collector while the eyes are standing still and
+records how long it took. poll(), called once per frame, notices when
+MicroPython collected on its own in between (the allocated byte count
+dropped without a collect() call): those are the collections that can stall
+a frame, and report() shows how many there were.
+"""
+
+import gc
+import time
+from array import array
+
+_COLLECTS = 0
+_UNSCHEDULED = 1
+_LAST_PAUSE_US = 2
+_MAX_PAUSE_US = 3
+_MIN_FREE = 4
+_LAST_ALLOC = 5
+
+stats = array("i", (0, 0, 0, 0, gc.mem_free(), gc.mem_alloc()))
+
+
+def collect():
+    start = time.ticks_us()
+    gc.collect()
+    pause = time.ticks_diff(time.ticks_us(), start)
+    stats[_COLLECTS] += 1
+    stats[_LAST_PAUSE_US] = pause
+    if pause > stats[_MAX_PAUSE_US]:
+        stats[_MAX_PAUSE_US] = pause
+    stats[_LAST_ALLOC] = gc.mem_alloc()
+
+
+def poll():
+    alloc = gc.mem_alloc()
+    if alloc < stats[_LAST_ALLOC]:
+        stats[_UNSCHEDULED] += 1
+    stats[_LAST_ALLOC] = alloc
+    free = gc.mem_free()
+    if free < stats[_MIN_FREE]:
+        stats[_MIN_FREE] = free
+
+
+def report():
+    print("Heap: {} bytes free (lowest {}), {} idle collections (last {} us, max {} us), {} unscheduled".format(
+        gc.mem_free(), stats[_MIN_FREE], stats[_COLLECTS], stats[_LAST_PAUSE_US],
+        stats[_MAX_PAUSE_US], stats[_UNSCHEDULED]))
+
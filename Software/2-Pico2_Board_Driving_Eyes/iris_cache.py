@@ -0,0 +1,71 @@
+"""LRU cache of pre-rendered iris sprites.
+
+Each entry is a Canvas holding one fully drawn iris (background included),
+keyed by (eyesMode, color scheme, radius). Sprites are evicted least recently
+used first once their combined size exceeds the byte budget. The whole cache
+is dropped as soon as the eyes mode or color scheme changes, because none of
+the old sprites can be shown again until the user turns back.
+"""
+
+
+class IrisCache:
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._sprites = {}
+        self._order = []     # Radii, least recently used first
+        self._mode = None    # eyesMode and scheme the cached sprites belong to
+        self._scheme = None
+
+    def clear(self):
+        self._sprites = {}
+        self._order = []
+        self.used = 0
+        self._mode = None
+        self._scheme = None
+
+    def _own(self, mode, scheme):
+        # Kept as two fields: comparing them allocates nothing.
+        if mode != self._mode or scheme != self._scheme:
+            self.clear()
+            self._mode = mode
+            self._scheme = scheme
+            return False
+        return True
+
+    def get(self, mode, scheme, radius):
+        if not self._own(mode, scheme):
+            self.misses += 1
+            return None
+        sprite = self._sprites.get(radius)
+        if sprite is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        order = self._order
+        if order[-1] != radius:
+            order.remove(radius)
+            order.append(radius)
+        return sprite
+
+    def put(self, mode, scheme, radius, sprite):
+        self._own(mode, scheme)
+        size = len(sprite.buffer)
+        if size > self.budget:
+            return
+        old = self._sprites.pop(radius, None)
+        if old is not None:
+            self._order.remove(radius)
+            self.used -= len(old.buffer)
+        while self.used + size > self.budget:
+            evicted = self._order.pop(0)
+            self.used -= len(self._sprites.pop(evicted).buffer)
+        self._sprites[radius] = sprite
+        self._order.append(radius)
+        self.used += size
+
+    def report(self, name):
+        print("{}: {} cached ({} bytes), {} hits, {} misses".format(
+            name, len(self._sprites), self.used, self.hits, self.misses))
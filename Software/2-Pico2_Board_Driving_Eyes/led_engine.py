@@ -0,0 +1,74 @@
+"""One task fading all the status LEDs, with gamma-corrected brightness.
+
+Each LED ramps up and down continuously following its (fade_time, steps)
+pattern: fade_time seconds from off to full brightness and back again, in
+steps distinct levels. Instead of one task per LED sleeping between steps,
+run() wakes at UPDATE_HZ, works out every LED's level from the time that
+has passed and writes the PWM duty only when it changed. Levels go through
+a gamma table, so the fade looks even to the eye instead of jumping to
+bright early.
+
+set_pattern() swaps in new patterns at any time; the ramps restart dark.
+"""
+
+import time
+import uasyncio as asyncio
+from array import array
+from machine import Pin, PWM
+
+UPDATE_HZ = 50
+PWM_FREQ = 2000
+GAMMA = 2.2
+
+_LEVELS = 256
+# Level (0..255) -> 16-bit duty cycle.
+GAMMA_TABLE = array("H", [int(65535 * (i / (_LEVELS - 1)) ** GAMMA + 0.5) for i in range(_LEVELS)])
+
+
+class LedEngine:
+    def __init__(self, pins):
+        self.leds = [PWM(Pin(pin)) for pin in pins]
+        for led in self.leds:
+            led.freq(PWM_FREQ)
+            led.duty_u16(0)
+        n = len(pins)
+        self._step_us = array("i", bytes(4 * n))   # Time spent on each level
+        self._steps = array("H", bytes(2 * n))     # Levels per ramp
+        self._phase_us = array("i", bytes(4 * n))  # Position in the up-down cycle
+        self._duty = array("i", [-1] * n)          # Last duty written
+
+    def set_pattern(self, pattern):
+        # pattern: one (fade_time, steps) per LED, as led_pattern in main.
+        for k, (fade_time, steps) in enumerate(pattern):
+            steps = max(2, steps)
+            self._steps[k] = steps
+            self._step_us[k] = max(1, int(fade_time * 1000000 / steps))
+            self._phase_us[k] = 0
+
+    def update(self, elapsed_us):
+        steps = self._steps
+        step_us = self._step_us
+        phase_us = self._phase_us
+        for k in range(len(self.leds)):
+            n = steps[k]
+            if n == 0:
+                continue
+            # One cycle is n levels up then n levels down.
+            phase = (phase_us[k] + elapsed_us) % (2 * n * step_us[k])
+            phase_us[k] = phase
+            i = phase // step_us[k]
+            if i >= n:
+                i = 2 * n - 1 - i
+            duty = GAMMA_TABLE[i * (_LEVELS - 1) // (n - 1)]
+            if duty != self._duty[k]:
+                self._duty[k] = duty
+                self.leds[k].duty_u16(duty)
+
+    async def run(self):
+        period_ms = 1000 // UPDATE_HZ
+        last = time.ticks_us()
+        while True:
+            await asyncio.sleep_ms(period_ms)
+            now = time.ticks_us()
+            self.update(time.ticks_diff(now, last))
+            last = now
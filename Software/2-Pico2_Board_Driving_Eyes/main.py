@@ -1,106 +1,56 @@
 import uasyncio as asyncio
 import random
-import math
 import gc9a01
 import tft_config
-from machine import Pin, UART, PWM
+from canvas import Canvas, IndexCanvas, palette
+from iris_cache import IrisCache
+import glyphs
+import spans
+import round_panel
+import motion
+from frame_scheduler import FrameScheduler
+from led_engine import LedEngine
+import profiler
+import heap
+import uart_link
+from array import array
+from machine import Pin, UART
 from micropython_rotary_encoder import RotaryEncoderRP2, RotaryEncoderEvent
 from uasyncio import Lock
 import time  # Needed for seeding RNG (optional)
 
-color_scheme_changed = False
-eyes_mode_changed = False
-
-dollar_bitmap = [
-    "00100",
-    "01111",
-    "10000",
-    "10000",
-    "01110",
-    "00001",
-    "00001",
-    "11110",
-    "00100"
-]
-
-heart_bitmap = [
-    "001110011100",
-    "011111111110",
-    "111111111111",
-    "111111111111",
-    "111111111111",
-    "111111111111",
-    "011111111110",
-    "001111111100",
-    "000111111000",
-    "000011110000",
-    "000001100000"
-]
-
-bat_bitmap = [
-    "1,1,0,0,0,0,0,0,0,0,0,1,1",
-    "0,1,1,0,0,1,0,1,0,0,1,1,0",
-    "0,0,1,1,0,1,1,1,0,1,1,0,0",
-    "0,0,0,1,1,1,1,1,1,1,0,0,0",
-    "0,0,0,1,1,1,1,1,1,1,0,0,0",
-    "0,0,0,0,1,1,1,1,1,0,0,0,0",
-    "0,0,0,0,0,0,1,0,0,0,0,0,0",
-]
-
-def draw_dollar_sign(tft, cx, cy, scale, color):
-    # Draw a 5x9 dollar sign bitmap centered at (cx, cy)
-    for row_index, row in enumerate(dollar_bitmap):
-        for col_index, pixel in enumerate(row):
-            if pixel == "1":
-                for dy in range(scale):
-                    for dx in range(scale):
-                        x = cx + (col_index - 2) * scale + dx
-                        y = cy + (row_index - 4) * scale + dy
-                        tft.pixel(x, y, color)
-
-def draw_heart(tft, cx, cy, scale, color):
-    width = len(heart_bitmap[0])
-    height = len(heart_bitmap)
-    offset_x = (width * scale) // 2
-    offset_y = (height * scale) // 2
-
-    for y, row in enumerate(heart_bitmap):
-        for x, bit in enumerate(row):
-            if bit == "1":
-                tft.fill_rect(
-                    cx - offset_x + x * scale,
-                    cy - offset_y + y * scale,
-                    scale,
-                    scale,
-                    color
-                )
-
-def draw_bat(tft, cx, cy, scale, color):
-    for row_index, row in enumerate(bat_bitmap):
-        bits = row.split(",")
-        for col_index, bit in enumerate(bits):
-            if bit == "1":
-                for dy in range(scale):
-                    for dx in range(scale):
-                        x = cx + (col_index - len(bits) // 2) * scale + dx
-                        y = cy + (row_index - len(bat_bitmap) // 2) * scale + dy
-                        tft.pixel(x, y, color)
-
-led_tasks = [None, None, None]  # For pins 11, 12, 13
 
 led_pattern = [(5.0, 100)] * 3  # Default: (fade_time, steps) for R, G, B
+leds = LedEngine((11, 12, 13))
 
 draw_lock = Lock()
 
+# Input handlers set these to wake the task that has work to do.
+display_changed = asyncio.ThreadSafeFlag()   # Wakes refresh_display
+uart_changed = asyncio.ThreadSafeFlag()      # Wakes uart_transmit
+
 # Global flag
 force_animation = False  # Trigger immediate animation when encoder is rotated
 
 # ----- USER CONFIGURABLE PARAMETERS -----
-ANIMATION_STEP_DELAY_MIN = 0.001    # Minimum delay between animation steps (seconds)
-ANIMATION_STEP_DELAY_MAX = 0.010    # Maximum delay between animation steps (seconds)
+ANIMATION_FPS              = 50      # Target frame rate while the eyes move
+FRAME_REPORT_INTERVAL      = 0       # Print frame rate statistics every N seconds (0 = never; with PROFILE also on p)
 INTER_MOVEMENT_DELAY_MIN   = 0.25    # Minimum delay between movements (seconds)
 INTER_MOVEMENT_DELAY_MAX   = 5.00    # Maximum delay between movements (seconds)
+BUTTON_DEBOUNCE_MS         = 30      # Time the button contacts get to settle after an edge
 BLINK_DELAY                = 0.12    # Blink delay (seconds)
+IRIS_SPRITE_CACHE          = True    # Render each iris once and blit it (uses RAM)
+IRIS_CACHE_BUDGET          = 64 * 1024  # Maximum bytes held by cached iris sprites
+IRIS_SHAPE_BUDGET          = 32 * 1024  # Maximum bytes held by cached iris shapes (for fast recoloring)
+IRIS_COMPOSITOR            = True    # Redraw only changed scanline spans (needs the sprite cache)
+RENDER_FRAMEBUFFER         = False   # Compose each eye in RAM and push one blit per frame (90 KB)
+RENDER_PIPELINE            = False   # Push framebuffer frames by DMA while rendering the next (needs RENDER_FRAMEBUFFER)
+BROADCAST_WRITES           = True    # With RENDER_FRAMEBUFFER, send identical frames to both eyes in one SPI transfer
+RENDER_CORE1               = False   # Draw on the panels from the second core, keeping input responsive (not with RENDER_PIPELINE)
+MOTION_EASING              = motion.EASE_IN_OUT  # Eye movement curve (motion.LINEAR = constant speed)
+MOTION_OVERSHOOT_DISTANCE  = 30      # Moves at least this long (pixels) overshoot slightly; 0 = never
+GC_WHEN_IDLE               = True    # Collect garbage while the eyes stand still, not mid-movement
+PROFILE                    = False   # Count draw calls and time the hot paths (type p + Enter in the REPL to print, with the frame and heap stats)
 
 # ----- EYE SETUP (for both displays) -----
 cx = 240 // 2
@@ -110,20 +60,39 @@ base_iris_radius = eye_radius // 2    # 30
 iris_offset = (eye_radius * 3) // 4   # 45
 clear_margin = 2
 
+BLACK = 0
+WHITE = gc9a01.color565(255, 255, 255)
+PINK = gc9a01.color565(255, 192, 203)   # Light pink background for heart eyes
+
 # Sclera is always black.
 def get_sclera_color():
     if eyesMode == 106:
-        return gc9a01.color565(255, 255, 255)  # White
+        return WHITE
     else:
-        return gc9a01.color565(0, 0, 0)  # Black
-BLACK = 0
+        return BLACK
+
+def get_background_color():
+    if eyesMode == 106:
+        return PINK
+    else:
+        return BLACK
 
 # ----- GLOBAL COLOR SCHEME VARIABLE & ACCESSOR -----
 counter = 1    # Global counter selects the color scheme (1 to 25)
 encoder_changed = False    # Flag set True when encoder or button events change the display
+recolor_pending = False    # Flag set True when the encoder changes the color scheme
+
+# Color schemes compiled once into (iris_outer, iris_inner, pupil, highlight)
+# tuples, so drawing an iris does no dictionary lookups.
+IRIS_OUTER = 0
+IRIS_INNER = 1
+PUPIL = 2
+HIGHLIGHT = 3
+COLOR_SCHEMES = tuple((cs["iris_outer"], cs["iris_inner"], cs["pupil"], cs["highlight"])
+                      for cs in tft_config.color_schemes)
 
 def get_current_color_scheme():
-    return tft_config.color_schemes[counter - 1]
+    return COLOR_SCHEMES[counter - 1]
 
 # ----- EYES MODE & OVAL DIMENSIONS -----
 # Use eyesMode: 101 = round eyes, 102 = square eyes, 103 = oval eyes, 104 = rhombus., 105 = $, 106 = Heart
@@ -132,24 +101,34 @@ eyesMode = 101   # Startup eyesMode = 101 (round eyes)
 OVAL_H_FACTOR = 0.5   # Horizontal radius factor relative to iris_r.
 OVAL_V_FACTOR = 1.0   # Vertical radius factor relative to iris_r.
 
+# Icon eyes are drawn from compiled glyphs; add a glyph here to add an eye.
+ICON_GLYPHS = {
+    105: glyphs.DOLLAR,
+    106: glyphs.HEART,
+    107: glyphs.BAT,
+}
+EYES_MODES = [101, 102, 103, 104] + sorted(ICON_GLYPHS)
+
 # ----- ENCODER SETUP -----
 encoder_pin_clk = Pin(1, Pin.IN, Pin.PULL_UP)
 encoder_pin_dt  = Pin(19, Pin.IN, Pin.PULL_UP)
 encoder = RotaryEncoderRP2(pin_clk=encoder_pin_clk, pin_dt=encoder_pin_dt)
 
 def dec_counter():
-    global counter, encoder_changed, force_animation, color_scheme_changed
+    global counter, recolor_pending, force_animation
     counter = max(1, counter - 1)
-    encoder_changed = True
+    recolor_pending = True
     force_animation = True
-    color_scheme_changed = True
+    display_changed.set()
+    uart_changed.set()
 
 def inc_counter():
-    global counter, encoder_changed, force_animation, color_scheme_changed
+    global counter, recolor_pending, force_animation
     counter = min(25, counter + 1)
-    encoder_changed = True
+    recolor_pending = True
     force_animation = True
-    color_scheme_changed = True
+    display_changed.set()
+    uart_changed.set()
 
 encoder.on(RotaryEncoderEvent.TURN_LEFT, dec_counter)
 encoder.on(RotaryEncoderEvent.TURN_LEFT_FAST, dec_counter)
@@ -159,15 +138,28 @@ encoder.on(RotaryEncoderEvent.TURN_RIGHT_FAST, inc_counter)
 # ----- BUTTON SETUP -----
 # Button connected to GP2 (with internal pull-up; low when pressed)
 button = Pin(2, Pin.IN, Pin.PULL_UP)
+button_edge = asyncio.ThreadSafeFlag()
+
+def button_irq(pin):
+    button_edge.set()
+
+button.irq(button_irq, Pin.IRQ_FALLING | Pin.IRQ_RISING)
 
 async def check_button():
-    global eyesMode, encoder_changed, eyes_mode_changed
-    last_state = button.value()
-    mode_choices = [101, 102, 103, 104, 105, 106, 107]  # Valid expression modes
+    global eyesMode, encoder_changed
+    pressed = button.value() == 0
+    mode_choices = EYES_MODES  # Valid expression modes
 
     while True:
-        state = button.value()
-        if state == 0 and last_state == 1:
+        # Sleep until the level changes, let the contacts settle, then act on
+        # the settled level: bounces in between only cost one more wakeup.
+        await button_edge.wait()
+        await asyncio.sleep_ms(BUTTON_DEBOUNCE_MS)
+        state = button.value() == 0
+        if state == pressed:
+            continue
+        pressed = state
+        if pressed:
             old_mode = eyesMode
             new_mode = old_mode
             while new_mode == old_mode:
@@ -175,68 +167,44 @@ async def check_button():
 
             eyesMode = new_mode
             encoder_changed = True
-            eyes_mode_changed = True
+            display_changed.set()
+            uart_changed.set()
 
             # New random LED pattern
-            global led_pattern, led_tasks
+            global led_pattern
 
             led_pattern = [
                 (random.uniform(0.25, 10.0), random.randint(2, 200)) for _ in range(3)
             ]
-
-            # Cancel existing LED tasks
-            for task in led_tasks:
-                if task:
-                    task.cancel()
-
-            # Restart LED fade tasks with new parameters
-            led_tasks[0] = asyncio.create_task(led_fade(11, *led_pattern[0]))
-            led_tasks[1] = asyncio.create_task(led_fade(12, *led_pattern[1]))
-            led_tasks[2] = asyncio.create_task(led_fade(13, *led_pattern[2]))
-
-        last_state = state
-        await asyncio.sleep(0.05)
-
-            
-        last_state = state
-        await asyncio.sleep(0.05)            
+            leds.set_pattern(led_pattern)
 
 # ----- UART SETUP -----
 # Configure UART0 with TX on GP16 (Pin 21) at 115200 baud.
 uart = UART(0, baudrate=115200, tx=Pin(16))
-# We'll track last transmitted values:
-last_eyesMode = eyesMode
-last_counter = counter
+link = uart_link.FrameWriter(uart)
+state_payload = bytearray(2)
 
 async def uart_transmit():
-    global counter, eyesMode
-    global color_scheme_changed, eyes_mode_changed
-
+    # Every frame carries the whole state, so changes made while the previous
+    # frame was going out are sent together, with their latest values. The
+    # first frame tells the mouth the state it boots into.
     while True:
-        if color_scheme_changed:
-            uart.write("C{}\n".format(counter))
-            print("C{}\n".format(counter))
-            color_scheme_changed = False
-
-        if eyes_mode_changed:
-            uart.write("M{}\n".format(eyesMode))
-            print("M{}\n".format(eyesMode))
-            eyes_mode_changed = False
-
-        await asyncio.sleep(0.05)
+        state_payload[0] = counter
+        state_payload[1] = eyesMode
+        link.send(uart_link.STATE, state_payload)
+        print("State: color scheme {}, mode {}".format(counter, eyesMode))
+        await uart_changed.wait()
 
 # ----- HELPER FUNCTION: fill_ellipse -----
 def fill_ellipse(tft, cx, cy, a, b, color):
-    for y in range(-b, b + 1):
-        try:
-            x_extent = int(a * math.sqrt(1 - (y / b) ** 2))
-        except ValueError:
-            x_extent = 0
-        tft.fill_rect(cx - x_extent, cy + y, 2 * x_extent, 1, color)
+    spans.fill_spans(tft, cx, cy, spans.ellipse(a, b), color)
 
 # ----- DRAWING FUNCTIONS (using dynamic color scheme and eyesMode) -----
 def clear_iris_region_with_size(tft, old_x, old_y, old_r):
     global eyesMode
+    if IRIS_SPRITE_CACHE and IRIS_COMPOSITOR and tft in iris_on_screen:
+        erase_iris(tft)
+        return
     margin = clear_margin
     x0 = old_x - old_r - margin
     y0 = old_y - old_r - margin
@@ -253,68 +221,44 @@ def clear_iris_region_with_size(tft, old_x, old_y, old_r):
         w = 5 * scale + 3 * margin
         h = 9 * scale + 3 * margin + pad_y
 
-    # Use pink background for heart eyes (106)
-    if eyesMode == 106:
-        bg_color = gc9a01.color565(255, 192, 203)  # Light pink
-    else:
-        bg_color = gc9a01.color565(0, 0, 0)  # Black sclera fallback
+    tft.fill_rect(x0, y0, w, h, get_background_color())
 
-    tft.fill_rect(x0, y0, w, h, bg_color)
 
-
-def draw_iris(tft, iris_cx, iris_cy, iris_r):
-    cs = get_current_color_scheme()
-    if eyesMode == 104:
-        # Evil eyes: sharp diamond iris + vertical slit pupil
-        outer_r = iris_r
-        inner_r = int(iris_r * 0.7)
-        pupil_w = max(1, iris_r // 6)
-        pupil_h = iris_r
-
-        # Draw sharp diamond-like iris (rotated square)
-        for offset in range(-outer_r, outer_r + 1):
-            width = outer_r - abs(offset)
-            tft.fill_rect(iris_cx - width, iris_cy + offset, width * 2, 1, cs["iris_outer"])
-        for offset in range(-inner_r, inner_r + 1):
-            width = inner_r - abs(offset)
-            tft.fill_rect(iris_cx - width, iris_cy + offset, width * 2, 1, cs["iris_inner"])
-
-        # Draw vertical slit pupil (white instead of black)
-        WHITE = gc9a01.color565(255, 255, 255)
-        tft.fill_rect(iris_cx - pupil_w // 2, iris_cy - pupil_h // 2, pupil_w, pupil_h, BLACK)   
-    
+def draw_iris(tft, iris_cx, iris_cy, iris_r, cs=None):
+    if cs is None:
+        cs = get_current_color_scheme()
     if eyesMode == 101:
-        tft.fill_circle(iris_cx, iris_cy, iris_r, cs["iris_outer"])
+        tft.fill_circle(iris_cx, iris_cy, iris_r, cs[IRIS_OUTER])
         inner_r = int(iris_r * 0.8)
-        tft.fill_circle(iris_cx, iris_cy, inner_r, cs["iris_inner"])
+        tft.fill_circle(iris_cx, iris_cy, inner_r, cs[IRIS_INNER])
         pupil_r = iris_r // 2
-        tft.fill_circle(iris_cx, iris_cy, pupil_r, cs["pupil"])
+        tft.fill_circle(iris_cx, iris_cy, pupil_r, cs[PUPIL])
         highlight_r = pupil_r // 2
         highlight_x = iris_cx - (pupil_r // 2)
         highlight_y = iris_cy - (pupil_r // 2)
-        tft.fill_circle(highlight_x, highlight_y, highlight_r, cs["highlight"])
+        tft.fill_circle(highlight_x, highlight_y, highlight_r, cs[HIGHLIGHT])
     elif eyesMode == 102:
         outer_side = 2 * iris_r
-        tft.fill_rect(iris_cx - iris_r, iris_cy - iris_r, outer_side, outer_side, cs["iris_outer"])
+        tft.fill_rect(iris_cx - iris_r, iris_cy - iris_r, outer_side, outer_side, cs[IRIS_OUTER])
         inner_side = int(outer_side * 0.8)
-        tft.fill_rect(iris_cx - inner_side // 2, iris_cy - inner_side // 2, inner_side, inner_side, cs["iris_inner"])
+        tft.fill_rect(iris_cx - inner_side // 2, iris_cy - inner_side // 2, inner_side, inner_side, cs[IRIS_INNER])
         pupil_side = outer_side // 2
-        tft.fill_rect(iris_cx - pupil_side // 2, iris_cy - pupil_side // 2, pupil_side, pupil_side, cs["pupil"])
+        tft.fill_rect(iris_cx - pupil_side // 2, iris_cy - pupil_side // 2, pupil_side, pupil_side, cs[PUPIL])
         highlight_side = pupil_side // 2
-        tft.fill_rect(iris_cx - highlight_side // 2, iris_cy - highlight_side // 2, highlight_side, highlight_side, cs["highlight"])
+        tft.fill_rect(iris_cx - highlight_side // 2, iris_cy - highlight_side // 2, highlight_side, highlight_side, cs[HIGHLIGHT])
     elif eyesMode == 103:
         a_outer = int(iris_r * OVAL_H_FACTOR)
         b_outer = int(iris_r * OVAL_V_FACTOR)
-        fill_ellipse(tft, iris_cx, iris_cy, a_outer, b_outer, cs["iris_outer"])
+        fill_ellipse(tft, iris_cx, iris_cy, a_outer, b_outer, cs[IRIS_OUTER])
         a_inner = int(a_outer * 0.8)
         b_inner = int(b_outer * 0.8)
-        fill_ellipse(tft, iris_cx, iris_cy, a_inner, b_inner, cs["iris_inner"])
+        fill_ellipse(tft, iris_cx, iris_cy, a_inner, b_inner, cs[IRIS_INNER])
         a_pupil = a_outer // 2
         b_pupil = b_outer // 2
-        fill_ellipse(tft, iris_cx, iris_cy, a_pupil, b_pupil, cs["pupil"])
+        fill_ellipse(tft, iris_cx, iris_cy, a_pupil, b_pupil, cs[PUPIL])
         a_highlight = a_pupil // 2
         b_highlight = b_pupil // 2
-        fill_ellipse(tft, iris_cx - (a_pupil // 2), iris_cy - (b_pupil // 2), a_highlight, b_highlight, cs["highlight"])
+        fill_ellipse(tft, iris_cx - (a_pupil // 2), iris_cy - (b_pupil // 2), a_highlight, b_highlight, cs[HIGHLIGHT])
     elif eyesMode == 104:
         # Evil eyes: sharp diamond iris + vertical slit pupil
         scale = 1.1  # 20% bigger
@@ -324,32 +268,171 @@ def draw_iris(tft, iris_cx, iris_cy, iris_r):
         pupil_h = int(iris_r * scale)
 
         # Draw sharp diamond-like iris (rotated square)
-        for offset in range(-outer_r, outer_r + 1):
-            width = outer_r - abs(offset)
-            tft.fill_rect(iris_cx - width, iris_cy + offset, width * 2, 1, cs["iris_outer"])
-        for offset in range(-inner_r, inner_r + 1):
-            width = inner_r - abs(offset)
-            tft.fill_rect(iris_cx - width, iris_cy + offset, width * 2, 1, cs["iris_inner"])
+        spans.fill_spans(tft, iris_cx, iris_cy, spans.diamond(outer_r), cs[IRIS_OUTER])
+        spans.fill_spans(tft, iris_cx, iris_cy, spans.diamond(inner_r), cs[IRIS_INNER])
 
         # Draw vertical slit pupil (black)
         tft.fill_rect(iris_cx - pupil_w // 2, iris_cy - pupil_h // 2, pupil_w, pupil_h, BLACK)
-    elif eyesMode == 105:
-        # Dollar sign eyes
-        scale = max(1, iris_r // 4)  # Adjust size relative to iris
-        draw_dollar_sign(tft, iris_cx, iris_cy, scale, cs["iris_outer"])
-    elif eyesMode == 106:
-        # Heart eyes
-        scale = max(1, iris_r // 6)  # Scale based on iris size
-        draw_heart(tft, iris_cx, iris_cy, scale, cs["iris_outer"])
-    elif eyesMode == 107:
-        # Bat eyes
-        scale = max(1, iris_r // 6)  # Adjust as needed
-        draw_bat(tft, iris_cx, iris_cy, scale, cs["iris_outer"])
-        
+    elif eyesMode in ICON_GLYPHS:
+        # Dollar sign, heart and bat eyes
+        glyph = ICON_GLYPHS[eyesMode]
+        glyphs.draw_glyph(tft, glyph, iris_cx, iris_cy, glyph.scale(iris_r), cs[IRIS_OUTER])
+
+
+# ----- IRIS SPRITE CACHE -----
+# Each iris is first drawn once per eyes mode and radius as a shape of palette
+# indexes, then colored through the current scheme's palette. A new color
+# scheme only needs the shapes recolored, not drawn again.
+iris_cache = IrisCache(IRIS_CACHE_BUDGET)
+shape_cache = IrisCache(IRIS_SHAPE_BUDGET)
+
+BACKGROUND_INDEX = 0
+IRIS_INDEXES = (1, 2, 3, 4)   # A color scheme of palette indexes
+
+# The scheme the sprites are drawn in, taken from counter under draw_lock
+# when drawing starts, so an encoder turn in the middle of a movement does
+# not throw away the sprites warmed for it; the recolor follows afterwards.
+iris_scheme = counter
+
+def use_current_scheme():
+    global iris_scheme
+    iris_scheme = counter
+
+def iris_palette():
+    return palette((get_background_color(),) + COLOR_SCHEMES[iris_scheme - 1])
+
+def iris_half_extent(iris_r):
+    # Largest distance from the iris centre that draw_iris touches.
+    if eyesMode == 104:
+        return int(iris_r * 1.1)
+    elif eyesMode in ICON_GLYPHS:
+        glyph = ICON_GLYPHS[eyesMode]
+        return glyph.half_extent(glyph.scale(iris_r))
+    return iris_r
+
+def get_iris_shape(iris_r):
+    shape = shape_cache.get(eyesMode, 0, iris_r)
+    if shape is None:
+        half = iris_half_extent(iris_r)
+        side = 2 * half + 1
+        shape = IndexCanvas(side, side, -half, -half)
+        shape.fill(BACKGROUND_INDEX)
+        draw_iris(shape, 0, 0, iris_r, IRIS_INDEXES)
+        shape.spans = shape.row_spans(BACKGROUND_INDEX)
+        shape_cache.put(eyesMode, 0, iris_r, shape)
+    return shape
+
+def get_iris_sprite(iris_r):
+    sprite = iris_cache.get(eyesMode, iris_scheme, iris_r)
+    if sprite is None:
+        shape = get_iris_shape(iris_r)
+        sprite = Canvas(shape.width, shape.height, shape.x, shape.y)
+        sprite.recolor(shape, iris_palette())
+        sprite.spans = shape.spans
+        sprite.rows = span_rows(sprite)
+        iris_cache.put(eyesMode, iris_scheme, iris_r, sprite)
+    return sprite
+
+def render_iris(tft, iris_cx, iris_cy, iris_r):
+    # Draw the iris, from the sprite cache when enabled.
+    if not IRIS_SPRITE_CACHE:
+        draw_iris(tft, iris_cx, iris_cy, iris_r)
+        return
+    sprite = get_iris_sprite(iris_r)
+    x0 = iris_cx + sprite.x
+    y0 = iris_cy + sprite.y
+    if IRIS_COMPOSITOR:
+        composite_iris(tft, sprite, x0, y0)
+    else:
+        tft.blit_buffer(sprite.buffer, x0, y0, sprite.width, sprite.height)
+
+
+# ----- DIRTY-REGION COMPOSITOR -----
+# Remembers which sprite is on each panel and where, so a move only touches
+# the old iris pixels the new one does not cover, plus the new iris itself.
+class OnScreen:
+    # One per panel, updated in place every frame.
+    __slots__ = ("sprite", "x0", "y0")
+
+    def __init__(self, sprite, x0, y0):
+        self.sprite = sprite
+        self.x0 = x0
+        self.y0 = y0
+
+iris_on_screen = {}   # tft -> OnScreen
+
+def span_rows(sprite):
+    # A view of every row's span in the sprite buffer, made once per sprite
+    # so compositing does not allocate.
+    buf = memoryview(sprite.buffer)
+    spans = sprite.spans
+    w = sprite.width
+    rows = []
+    for row in range(sprite.height):
+        c = spans[2 * row]
+        d = spans[2 * row + 1]
+        rows.append(buf[(row * w + c) * 2:(row * w + d) * 2] if c < d else None)
+    return rows
+
+def clear_iris_spans(tft, old, ox0, oy0, new=None, x0=0, y0=0):
+    # Paint background over every old span pixel not covered by the new spans.
+    bg_color = get_background_color()
+    old_spans = old.spans
+    for row in range(old.height):
+        a = old_spans[2 * row]
+        b = old_spans[2 * row + 1]
+        if a >= b:
+            continue
+        a += ox0
+        b += ox0
+        y = oy0 + row
+        r = y - y0
+        if new is not None and 0 <= r < new.height and new.spans[2 * r] < new.spans[2 * r + 1]:
+            c = new.spans[2 * r] + x0
+            d = new.spans[2 * r + 1] + x0
+            if a < c:
+                tft.fill_rect(a, y, min(b, c) - a, 1, bg_color)
+            if d < b:
+                left = max(a, d)
+                tft.fill_rect(left, y, b - left, 1, bg_color)
+        else:
+            tft.fill_rect(a, y, b - a, 1, bg_color)
+
+def composite_iris(tft, sprite, x0, y0):
+    prev = iris_on_screen.get(tft)
+    if prev is None:
+        iris_on_screen[tft] = OnScreen(sprite, x0, y0)
+    else:
+        if prev.sprite is sprite and prev.x0 == x0 and prev.y0 == y0:
+            return
+        clear_iris_spans(tft, prev.sprite, prev.x0, prev.y0, sprite, x0, y0)
+        prev.sprite = sprite
+        prev.x0 = x0
+        prev.y0 = y0
+
+    rows = sprite.rows
+    spans = sprite.spans
+    for row in range(sprite.height):
+        data = rows[row]
+        if data is not None:
+            c = spans[2 * row]
+            tft.blit_buffer(data, x0 + c, y0 + row, spans[2 * row + 1] - c, 1)
+
+def erase_iris(tft):
+    prev = iris_on_screen.pop(tft, None)
+    if prev is not None:
+        clear_iris_spans(tft, prev.sprite, prev.x0, prev.y0)
+
 
 def update_iris_with_size(tft, old_x, old_y, new_x, new_y, old_r, new_r):
     global eyesMode
 
+    if IRIS_SPRITE_CACHE and IRIS_COMPOSITOR:
+        # The compositor knows exactly which pixels the old iris covered.
+        if old_x != new_x or old_y != new_y or old_r != new_r:
+            render_iris(tft, new_x, new_y, new_r)
+        return
+
     # Defaults
     adjusted_old_r = old_r
     adjusted_new_r = new_r
@@ -384,8 +467,8 @@ def update_iris_with_size(tft, old_x, old_y, new_x, new_y, old_r, new_r):
         tft.fill_rect(x0, y0, w, h, BLACK)
     # ------------------------------------------------
 
-    if (old_x, old_y, old_r) == (new_x, new_y, new_r):
-        return (old_x, old_y, old_r)
+    if old_x == new_x and old_y == new_y and old_r == new_r:
+        return
 
     old_left   = old_x - adjusted_old_r - margin
     old_top    = old_y - adjusted_old_r - margin
@@ -405,85 +488,154 @@ def update_iris_with_size(tft, old_x, old_y, new_x, new_y, old_r, new_r):
     width = right - left
     height = bottom - top
 
-    if eyesMode == 106:
-        bg_color = gc9a01.color565(255, 192, 203)
-    else:
-        bg_color = gc9a01.color565(0, 0, 0)
+    tft.fill_rect(left, top, width, height, get_background_color())
+    render_iris(tft, new_x, new_y, new_r)
+
+
+def frame_pending(tft1, tft2):
+    # Drawing straight to the panels leaves nothing for present() to do.
+    if renderer is not None:
+        return True
+    return RENDER_FRAMEBUFFER and (tft1.pending() or tft2.pending())
 
-    tft.fill_rect(left, top, width, height, bg_color)
-    draw_iris(tft, new_x, new_y, new_r)
-    return (new_x, new_y, new_r)
+def warm_iris_sprites(steps):
+    # Render the sprites for every radius of the movement before its first
+    # frame, as far as they fit in the cache together.
+    if not IRIS_SPRITE_CACHE:
+        return
+    pos = eye_motion.pos
+    seen = []
+    size = 0
+    for i in range(1, steps + 1):
+        eye_motion.step(i)
+        for r in (pos[2], pos[5]):
+            if r in seen:
+                continue
+            side = 2 * iris_half_extent(r) + 1
+            size += 2 * side * side
+            if size > IRIS_CACHE_BUDGET:
+                return
+            seen.append(r)
+            get_iris_sprite(r)
+
+async def present(tft1, tft2):
+    # Push the composed frame when drawing into off-screen framebuffers.
+    # With the DMA pipeline, waiting for the bus yields to the other tasks
+    # and the last transfer keeps running while the next frame is drawn.
+    # On core 1 rendering, the frame is done once core 1 has made every
+    # queued call; the framebuffers may only change after that.
+    if RENDER_FRAMEBUFFER:
+        if RENDER_PIPELINE:
+            await tft1.ready()
+        if BROADCAST_WRITES and tft1.same_frame(tft2):
+            tft1.show(tft_both)
+            tft2.discard()
+        else:
+            tft1.show()
+            if RENDER_PIPELINE:
+                await tft2.ready()
+            tft2.show()
+    if renderer is not None:
+        await renderer.wait()
+
+
+renderer = None   # Core1Renderer when drawing from core 1
+
+# ----- BROADCAST WRITES -----
+# When both framebuffers hold the same changed rows, present() sends them to
+# both panels at once through tft_both.
+tft_both = None
 
 
 def draw_sclera(tft):
+    iris_on_screen.pop(tft, None)
     if eyesMode == 106:
-        # Light pink background for heart eyes
-        PINK = gc9a01.color565(255, 192, 203)
-        tft.fill(PINK)
+        round_panel.fill(tft, PINK)
     else:
-        tft.fill(BLACK)
+        round_panel.fill(tft, BLACK)
         tft.fill_circle(cx, cy, eye_radius, get_sclera_color())
 
 # ----- GLOBAL EYE STATE -----
-current_state1 = (cx, cy, base_iris_radius)
-current_state2 = (cx, cy, base_iris_radius)
+# (x, y, r) of each iris, updated in place as the eyes move.
+current_state1 = array("h", (cx, cy, base_iris_radius))
+current_state2 = array("h", (cx, cy, base_iris_radius))
+
+def set_state(state, x, y, r):
+    state[0] = x
+    state[1] = y
+    state[2] = r
 
 # ----- ANIMATION FUNCTIONS -----
+eye_motion = motion.Motion()
+frames = FrameScheduler(ANIMATION_FPS)
+RANDOM_TARGET_RADIUS = (int(base_iris_radius * 0.8), int(base_iris_radius * 1.2))
+OVAL_TARGET_RADIUS = (base_iris_radius, int(base_iris_radius * 1.4))
+common_target = array("h", bytes(6))    # Targets are filled in place
+random_target1 = array("h", bytes(6))
+random_target2 = array("h", bytes(6))
+
+def long_move(state, target, limit):
+    dx = target[0] - state[0]
+    dy = target[1] - state[1]
+    return dx * dx + dy * dy >= limit
+
+def pick_easing(state1, target1, state2, target2):
+    # Long movements overshoot slightly, like a real saccade.
+    if MOTION_OVERSHOOT_DISTANCE:
+        limit = MOTION_OVERSHOOT_DISTANCE * MOTION_OVERSHOOT_DISTANCE
+        if long_move(state1, target1, limit) or long_move(state2, target2, limit):
+            return motion.OVERSHOOT
+    return MOTION_EASING
+
 async def animate_eyes(tft1, state1, tft2, state2, steps, target1=None, target2=None):
+    # Moves both eyes to their targets; state1 and state2 are updated in place.
     from uasyncio import Lock
     global draw_lock
 
-    (start_x1, start_y1, start_r1) = state1
-    (start_x2, start_y2, start_r2) = state2
-
     if target1 is None:
-        angle1 = random.uniform(0, 2 * math.pi)
-        distance1 = random.uniform(0, iris_offset)
-        target_r1 = int(base_iris_radius * random.uniform(0.8, 1.2))
-        target_x1 = cx + int(distance1 * math.cos(angle1))
-        target_y1 = cy + int(distance1 * math.sin(angle1))
-    else:
-        target_x1, target_y1, target_r1 = target1
-
+        target1 = motion.random_target(cx, cy, iris_offset, RANDOM_TARGET_RADIUS[0],
+                                       RANDOM_TARGET_RADIUS[1], random_target1)
     if target2 is None:
-        angle2 = random.uniform(0, 2 * math.pi)
-        distance2 = random.uniform(0, iris_offset)
-        target_r2 = int(base_iris_radius * random.uniform(0.8, 1.2))
-        target_x2 = cx + int(distance2 * math.cos(angle2))
-        target_y2 = cy + int(distance2 * math.sin(angle2))
-    else:
-        target_x2, target_y2, target_r2 = target2
-
-    dx1 = (target_x1 - start_x1) / steps
-    dy1 = (target_y1 - start_y1) / steps
-    dr1 = (target_r1 - start_r1) / steps
-    dx2 = (target_x2 - start_x2) / steps
-    dy2 = (target_y2 - start_y2) / steps
-    dr2 = (target_r2 - start_r2) / steps
-
-    local_state1 = state1
-    local_state2 = state2
+        target2 = motion.random_target(cx, cy, iris_offset, RANDOM_TARGET_RADIUS[0],
+                                       RANDOM_TARGET_RADIUS[1], random_target2)
+    eye_motion.begin(state1, target1, state2, target2, steps,
+                     pick_easing(state1, target1, state2, target2))
+    pos = eye_motion.pos
 
     async with draw_lock:
-        for i in range(steps):
-            new_x1 = int(start_x1 + dx1 * (i + 1))
-            new_y1 = int(start_y1 + dy1 * (i + 1))
-            new_r1 = int(start_r1 + dr1 * (i + 1))
-            new_x2 = int(start_x2 + dx2 * (i + 1))
-            new_y2 = int(start_y2 + dy2 * (i + 1))
-            new_r2 = int(start_r2 + dr2 * (i + 1))
-
-            local_state1 = update_iris_with_size(
-                tft1, local_state1[0], local_state1[1],
-                new_x1, new_y1, local_state1[2], new_r1
+        use_current_scheme()
+        warm_iris_sprites(steps)
+        i = 0
+        while i < steps:
+            # Steps skipped after a slow frame are dropped, the last one never is.
+            i += 1
+            frames.begin()
+            eye_motion.step(i)
+            new_x1 = pos[0]
+            new_y1 = pos[1]
+            new_r1 = pos[2]
+            new_x2 = pos[3]
+            new_y2 = pos[4]
+            new_r2 = pos[5]
+
+            update_iris_with_size(
+                tft1, state1[0], state1[1],
+                new_x1, new_y1, state1[2], new_r1
             )
-            local_state2 = update_iris_with_size(
-                tft2, local_state2[0], local_state2[1],
-                new_x2, new_y2, local_state2[2], new_r2
+            set_state(state1, new_x1, new_y1, new_r1)
+            update_iris_with_size(
+                tft2, state2[0], state2[1],
+                new_x2, new_y2, state2[2], new_r2
             )
-            await asyncio.sleep(random.uniform(ANIMATION_STEP_DELAY_MIN, ANIMATION_STEP_DELAY_MAX))
-
-    return local_state1, local_state2
+            set_state(state2, new_x2, new_y2, new_r2)
+            if frame_pending(tft1, tft2):
+                await present(tft1, tft2)
+            await asyncio.sleep_ms(frames.end(eyesMode))
+            heap.poll()
+            dropped = frames.dropped
+            if dropped and i < steps - 1:
+                i = min(steps - 1, i + dropped)
+        frames.idle()
 
 
 async def blink_eyes(tft1, state1, tft2, state2, blink_delay=BLINK_DELAY):
@@ -491,65 +643,51 @@ async def blink_eyes(tft1, state1, tft2, state2, blink_delay=BLINK_DELAY):
     for i in range(num_blinks):
         clear_iris_region_with_size(tft1, state1[0], state1[1], state1[2])
         clear_iris_region_with_size(tft2, state2[0], state2[1], state2[2])
+        await present(tft1, tft2)
         await asyncio.sleep(blink_delay)
-        draw_iris(tft1, state1[0], state1[1], state1[2])
-        draw_iris(tft2, state2[0], state2[1], state2[2])
+        render_iris(tft1, state1[0], state1[1], state1[2])
+        render_iris(tft2, state2[0], state2[1], state2[2])
+        await present(tft1, tft2)
         if i < num_blinks - 1:
             await asyncio.sleep(blink_delay)
-    return state1, state2
-
-# ----- LED FADE TASK -----
-# Generic LED fade task for a given PWM pin and fade_time (seconds for fade in or fade out).
-async def led_fade(pin_number, fade_time=2.0, steps=100):
-    try:
-        led = PWM(Pin(pin_number))
-        led.freq(2000)
-        led.duty_u16(0)  # Ensure it's not off forever
-        max_duty = 65535
-        steps = max(2, steps)
-        delay = fade_time / steps
-
-        while True:
-            for i in range(steps):
-                duty = int((i / (steps - 1)) * max_duty)
-                led.duty_u16(duty)
-                await asyncio.sleep(delay)
-            for i in range(steps):
-                duty = int(((steps - 1 - i) / (steps - 1)) * max_duty)
-                led.duty_u16(duty)
-                await asyncio.sleep(delay)
-    except asyncio.CancelledError:
-        led.duty_u16(0)  # Turn off gracefully
-        return
-
 
 # ----- MAIN ANIMATION LOOP -----
 async def main():
-    global tft1, tft2, current_state1, current_state2
-    tft1 = tft_config.config1(0)
-    tft2 = tft_config.config2(0)
+    global tft1, tft2, tft_both, renderer
+    # DMA pipeline transfers start from core 0, so they rule out core 1 drawing.
+    core1 = RENDER_CORE1 and not (RENDER_FRAMEBUFFER and RENDER_PIPELINE)
+    tft1 = tft_config.config1(0, framebuffer=RENDER_FRAMEBUFFER, pipeline=RENDER_PIPELINE, core1=core1)
+    tft2 = tft_config.config2(0, framebuffer=RENDER_FRAMEBUFFER, pipeline=RENDER_PIPELINE, core1=core1)
     tft1.init()
     tft2.init()
-
+    tft_both = tft_config.config_both(core1=core1)
+    if core1:
+        renderer = tft_config.core1_renderer()
+        renderer.start()
+    if PROFILE:
+        tft1 = profiler.CountingDisplay(tft1)
+        tft2 = profiler.CountingDisplay(tft2)
+        tft_both = profiler.CountingDisplay(tft_both)
+
+    use_current_scheme()
     draw_sclera(tft1)
     draw_sclera(tft2)
 
-    current_state1 = (cx, cy, base_iris_radius)
-    current_state2 = (cx, cy, base_iris_radius)
-    draw_iris(tft1, cx, cy, base_iris_radius)
-    draw_iris(tft2, cx, cy, base_iris_radius)
+    set_state(current_state1, cx, cy, base_iris_radius)
+    set_state(current_state2, cx, cy, base_iris_radius)
+    render_iris(tft1, cx, cy, base_iris_radius)
+    render_iris(tft2, cx, cy, base_iris_radius)
+    await present(tft1, tft2)
+    last_report = time.ticks_ms()
 
     while True:
         steps = random.randint(5, 10)
-        common_angle = random.uniform(0, 2 * math.pi)
-        common_distance = random.uniform(0, iris_offset)
         if eyesMode == 103:
-            common_target_r = int(base_iris_radius * random.uniform(1.0, 1.4))
+            motion.random_target(cx, cy, iris_offset, OVAL_TARGET_RADIUS[0],
+                                 OVAL_TARGET_RADIUS[1], common_target)
         else:
-            common_target_r = int(base_iris_radius * random.uniform(0.8, 1.2))
-        common_target = (cx + int(common_distance * math.cos(common_angle)),
-                         cy + int(common_distance * math.sin(common_angle)),
-                         common_target_r)
+            motion.random_target(cx, cy, iris_offset, RANDOM_TARGET_RADIUS[0],
+                                 RANDOM_TARGET_RADIUS[1], common_target)
 
         if random.random() < 0.8:
             target1 = common_target
@@ -562,30 +700,76 @@ async def main():
                 target1 = common_target
                 target2 = None
 
-        current_state1, current_state2 = await animate_eyes(tft1, current_state1, tft2, current_state2, steps, target1, target2)
+        await animate_eyes(tft1, current_state1, tft2, current_state2, steps, target1, target2)
+        if FRAME_REPORT_INTERVAL and time.ticks_diff(time.ticks_ms(), last_report) >= FRAME_REPORT_INTERVAL * 1000:
+            frames.report()
+            heap.report()
+            iris_cache.report("Iris sprites")
+            last_report = time.ticks_ms()
         wait_time = random.uniform(INTER_MOVEMENT_DELAY_MIN, INTER_MOVEMENT_DELAY_MAX)
+        if GC_WHEN_IDLE:
+            heap.collect()
         if wait_time >= 3:
             await asyncio.sleep(3)
-            current_state1, current_state2 = await blink_eyes(tft1, current_state1, tft2, current_state2)
+            await blink_eyes(tft1, current_state1, tft2, current_state2)
             await asyncio.sleep(wait_time - 3)
         else:
             await asyncio.sleep(wait_time)
 
 # ----- REFRESH TASK -----
+def redraw_eye(tft, state):
+    draw_sclera(tft)
+    render_iris(tft, state[0], state[1], state[2])
+
+def recolor_eyes(tft1, tft2):
+    # A new color scheme only changes the iris: draw it again in place, over
+    # exactly the pixels it already covers.
+    render_iris(tft1, current_state1[0], current_state1[1], current_state1[2])
+    render_iris(tft2, current_state2[0], current_state2[1], current_state2[2])
+
 async def refresh_display():
-    global tft1, tft2, current_state1, current_state2, encoder_changed
+    global tft1, tft2, current_state1, current_state2, encoder_changed, recolor_pending
     while True:
-        if tft1 is not None and tft2 is not None and encoder_changed:
+        await display_changed.wait()
+        if tft1 is None or tft2 is None:
+            continue
+        if encoder_changed:
             async with draw_lock:
-                tft1.fill(BLACK)
-                tft2.fill(BLACK)
-                await asyncio.sleep(0.05)
-                draw_sclera(tft1)
-                draw_iris(tft1, current_state1[0], current_state1[1], current_state1[2])
-                draw_sclera(tft2)
-                draw_iris(tft2, current_state2[0], current_state2[1], current_state2[2])
                 encoder_changed = False
-        await asyncio.sleep(0.05)
+                recolor_pending = False
+                use_current_scheme()
+                round_panel.fill(tft1, BLACK)
+                round_panel.fill(tft2, BLACK)
+                await present(tft1, tft2)
+                await asyncio.sleep(0.05)
+                redraw_eye(tft1, current_state1)
+                redraw_eye(tft2, current_state2)
+                await present(tft1, tft2)
+        elif recolor_pending:
+            # Encoder turns made while waiting for the lock end up as one
+            # recolor with the latest scheme.
+            async with draw_lock:
+                recolor_pending = False
+                use_current_scheme()
+                recolor_eyes(tft1, tft2)
+                await present(tft1, tft2)
+
+
+# ----- PROFILING -----
+# Only wrapped when enabled, so the normal build calls the functions directly.
+if PROFILE:
+    draw_iris = profiler.timed("draw_iris", draw_iris)
+    render_iris = profiler.timed("render_iris", render_iris)
+    update_iris_with_size = profiler.timed("update_iris_with_size", update_iris_with_size)
+    clear_iris_region_with_size = profiler.timed("clear_iris_region", clear_iris_region_with_size)
+    draw_sclera = profiler.timed("draw_sclera", draw_sclera)
+    redraw_eye = profiler.timed("refresh_display", redraw_eye)
+    recolor_eyes = profiler.timed("recolor_eyes", recolor_eyes)
+    blink_eyes = profiler.timed_async("blink_eyes", blink_eyes)
+    frames.recorder = profiler.timer("frame")
+    profiler.add_report(frames.report, frames.reset)
+    profiler.add_report(heap.report)
+    profiler.add_report(lambda: iris_cache.report("Iris sprites"))
 
 
 # ----- COMBINED MAIN -----
@@ -595,19 +779,20 @@ async def combined_main():
         (random.uniform(0.25, 10.0), random.randint(2, 200)) for _ in range(3)
     ]
 
-    global led_tasks
-    led_tasks[0] = asyncio.create_task(led_fade(11, *led_pattern[0]))
-    led_tasks[1] = asyncio.create_task(led_fade(12, *led_pattern[1]))
-    led_tasks[2] = asyncio.create_task(led_fade(13, *led_pattern[2]))
+    leds.set_pattern(led_pattern)
 
     # Run everything else that needs to run continuously
-    await asyncio.gather(
+    tasks = [
+        leds.run(),
         encoder.async_tick(),
         main(),
         refresh_display(),
         check_button(),
         uart_transmit()
-    )
+    ]
+    if PROFILE:
+        tasks.append(profiler.console())
+    await asyncio.gather(*tasks)
 
 asyncio.run(combined_main())
 
@@ -0,0 +1,102 @@
+"""Fixed-point eye motion with precomputed easing curves.
+
+Positions are interpolated in integer maths: an easing table maps animation
+progress to a Q12 fraction (4096 = at the target) and each step is one
+table lookup plus a multiply and shift per coordinate. Saccade targets are
+picked with a Q14 sine table instead of math.sin/math.cos.
+
+Curves:
+    LINEAR       constant speed, as the original animation
+    EASE_IN_OUT  smooth start and stop
+    OVERSHOOT    fast start, slight overshoot, settles on the target
+"""
+
+import random
+from array import array
+
+Q = 12
+ONE = 1 << Q
+EASE_SAMPLES = 64
+
+SIN_SIZE = 256   # Angles are 0..255 for a full turn
+SIN_Q = 14
+
+
+def _curve(fn):
+    return array("h", [int(fn(i / EASE_SAMPLES) * ONE + 0.5) for i in range(EASE_SAMPLES + 1)])
+
+def _ease_in_out(t):
+    return t * t * (3 - 2 * t)
+
+def _overshoot(t):
+    s = 1.70158
+    t -= 1
+    return t * t * ((s + 1) * t + s) + 1
+
+def _sin_table():
+    import math
+    return array("h", [int(math.sin(2 * math.pi * i / SIN_SIZE) * (1 << SIN_Q))
+                       for i in range(SIN_SIZE)])
+
+LINEAR = _curve(lambda t: t)
+EASE_IN_OUT = _curve(_ease_in_out)
+OVERSHOOT = _curve(_overshoot)
+SIN = _sin_table()
+
+
+def sin_q14(angle):
+    return SIN[angle & (SIN_SIZE - 1)]
+
+def cos_q14(angle):
+    return SIN[(angle + SIN_SIZE // 4) & (SIN_SIZE - 1)]
+
+
+def random_target(cx, cy, max_distance, r_min, r_max, out=None):
+    # Random (x, y, r) within max_distance of the centre, written into out
+    # (an array of three) when given.
+    angle = random.getrandbits(8)
+    distance = (random.getrandbits(8) * max_distance) >> 8
+    r = r_min + ((random.getrandbits(8) * (r_max - r_min + 1)) >> 8)
+    x = cx + ((distance * cos_q14(angle)) >> SIN_Q)
+    y = cy + ((distance * sin_q14(angle)) >> SIN_Q)
+    if out is None:
+        return (x, y, r)
+    out[0] = x
+    out[1] = y
+    out[2] = r
+    return out
+
+
+class Motion:
+    """
+    Interpolates both eyes from their start to their target states.
+    begin() once per movement, then step(i) for i = 1..steps fills pos with
+    (x1, y1, r1, x2, y2, r2) without allocating.
+    """
+
+    def __init__(self):
+        self.start = array("h", bytes(12))
+        self.delta = array("h", bytes(12))
+        self.pos = array("h", bytes(12))
+        self.steps = 1
+        self.curve = LINEAR
+
+    def begin(self, state1, target1, state2, target2, steps, curve=LINEAR):
+        start = self.start
+        delta = self.delta
+        for k in range(3):
+            start[k] = state1[k]
+            delta[k] = target1[k] - state1[k]
+            start[k + 3] = state2[k]
+            delta[k + 3] = target2[k] - state2[k]
+        self.steps = steps
+        self.curve = curve
+
+    def step(self, i):
+        e = self.curve[(i * EASE_SAMPLES) // self.steps]
+        start = self.start
+        delta = self.delta
+        pos = self.pos
+        for k in range(6):
+            pos[k] = start[k] + ((delta[k] * e) >> Q)
+        return pos
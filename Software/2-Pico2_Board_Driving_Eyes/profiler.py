@@ -0,0 +1,233 @@
+"""Optional hot-path profiling for the eyes board.
+
+Nothing here runs unless main.py sets PROFILE = True. Then:
+
+- CountingDisplay wraps a display and counts calls and pixels for every
+  drawing primitive (fill, fill_rect, hline, vline, pixel, fill_circle,
+  blit_buffer).
+- timed() and timed_async() wrap functions and record how long each call
+  takes, in microseconds, into a preallocated ring buffer per name.
+- add_report() registers other statistics (frame rate, ...) to print and
+  reset along with the profiler's own.
+- console() reads commands from the USB REPL while the animation runs:
+      p  print call counts, timing histograms and the added reports
+      r  reset all counters
+"""
+
+import sys
+import time
+from array import array
+import uasyncio as asyncio
+
+RING_SIZE = 256        # Samples kept per timer
+HISTOGRAM_BUCKETS = 12  # Powers of two starting at HISTOGRAM_FIRST_US
+HISTOGRAM_FIRST_US = 64
+HISTOGRAM_WIDTH = 32    # Characters in the longest histogram bar
+
+# ----- PRIMITIVE COUNTERS -----
+_CALLS = 0
+_PIXELS = 1
+
+primitives = {}   # name -> [calls, pixels]
+
+
+def _counter(name):
+    counter = primitives.get(name)
+    if counter is None:
+        counter = primitives[name] = [0, 0]
+    return counter
+
+
+class CountingDisplay:
+    """
+    Counts the drawing calls made on a display and passes them on. Anything
+    else (init, show, ...) goes straight to the wrapped display.
+    """
+
+    def __init__(self, tft):
+        self._tft = tft
+        self._fill = _counter("fill")
+        self._fill_rect = _counter("fill_rect")
+        self._hline = _counter("hline")
+        self._vline = _counter("vline")
+        self._pixel = _counter("pixel")
+        self._fill_circle = _counter("fill_circle")
+        self._blit_buffer = _counter("blit_buffer")
+
+    def __getattr__(self, name):
+        return getattr(self._tft, name)
+
+    def fill(self, color):
+        c = self._fill
+        c[_CALLS] += 1
+        c[_PIXELS] += self._tft.width() * self._tft.height()
+        self._tft.fill(color)
+
+    def fill_rect(self, x, y, w, h, color):
+        c = self._fill_rect
+        c[_CALLS] += 1
+        c[_PIXELS] += w * h
+        self._tft.fill_rect(x, y, w, h, color)
+
+    def hline(self, x, y, w, color):
+        c = self._hline
+        c[_CALLS] += 1
+        c[_PIXELS] += w
+        self._tft.hline(x, y, w, color)
+
+    def vline(self, x, y, h, color):
+        c = self._vline
+        c[_CALLS] += 1
+        c[_PIXELS] += h
+        self._tft.vline(x, y, h, color)
+
+    def pixel(self, x, y, color):
+        c = self._pixel
+        c[_CALLS] += 1
+        c[_PIXELS] += 1
+        self._tft.pixel(x, y, color)
+
+    def fill_circle(self, x, y, r, color):
+        c = self._fill_circle
+        c[_CALLS] += 1
+        c[_PIXELS] += (355 * r * r) // 113   # Close enough to the midpoint circle
+        self._tft.fill_circle(x, y, r, color)
+
+    def blit_buffer(self, buffer, x, y, w, h):
+        c = self._blit_buffer
+        c[_CALLS] += 1
+        c[_PIXELS] += w * h
+        self._tft.blit_buffer(buffer, x, y, w, h)
+
+
+# ----- TIMERS -----
+class Timer:
+    def __init__(self, name):
+        self.name = name
+        self.samples = array("I", bytes(4 * RING_SIZE))
+        self.reset()
+
+    def reset(self):
+        self.index = 0
+        self.calls = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, us):
+        self.samples[self.index] = us
+        self.index = (self.index + 1) % RING_SIZE
+        self.calls += 1
+        self.total_us += us
+        if us > self.max_us:
+            self.max_us = us
+
+    def histogram(self):
+        # Counts per power-of-two bucket over the samples still in the ring.
+        buckets = [0] * HISTOGRAM_BUCKETS
+        for k in range(min(self.calls, RING_SIZE)):
+            us = self.samples[k]
+            b = 0
+            limit = HISTOGRAM_FIRST_US
+            while us >= limit and b < HISTOGRAM_BUCKETS - 1:
+                limit <<= 1
+                b += 1
+            buckets[b] += 1
+        return buckets
+
+
+timers = {}   # name -> Timer
+
+
+def timer(name):
+    t = timers.get(name)
+    if t is None:
+        t = timers[name] = Timer(name)
+    return t
+
+
+def timed(name, fn):
+    t = timer(name)
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+
+    def wrapper(*args):
+        start = ticks_us()
+        result = fn(*args)
+        t.record(ticks_diff(ticks_us(), start))
+        return result
+    return wrapper
+
+
+def timed_async(name, fn):
+    t = timer(name)
+    ticks_us = time.ticks_us
+    ticks_diff = time.ticks_diff
+
+    async def wrapper(*args):
+        start = ticks_us()
+        result = await fn(*args)
+        t.record(ticks_diff(ticks_us(), start))
+        return result
+    return wrapper
+
+
+# ----- REPORTING -----
+reports = []   # (report, reset) pairs added by add_report()
+
+
+def add_report(report, reset=None):
+    reports.append((report, reset))
+
+
+def dump():
+    print("Draw calls:")
+    for name in sorted(primitives):
+        calls, pixels = primitives[name]
+        if calls:
+            print("  {:12s} {:8d} calls {:10d} px {:8d} px/call".format(
+                name, calls, pixels, pixels // calls))
+    print("Timings (last {} samples per name):".format(RING_SIZE))
+    for name in sorted(timers):
+        t = timers[name]
+        if not t.calls:
+            continue
+        print("  {}: {} calls, avg {:.2f} ms, max {:.2f} ms".format(
+            name, t.calls, t.total_us / t.calls / 1000, t.max_us / 1000))
+        buckets = t.histogram()
+        peak = max(buckets)
+        limit = HISTOGRAM_FIRST_US
+        for b in range(HISTOGRAM_BUCKETS):
+            if buckets[b]:
+                label = ">=" if b == HISTOGRAM_BUCKETS - 1 else "< "
+                shown = limit >> 1 if b == HISTOGRAM_BUCKETS - 1 else limit
+                print("    {}{:7.2f} ms {:5d} {}".format(
+                    label, shown / 1000, buckets[b], "#" * max(1, buckets[b] * HISTOGRAM_WIDTH // peak)))
+            limit <<= 1
+    for report, _ in reports:
+        report()
+
+
+def reset():
+    for counter in primitives.values():
+        counter[_CALLS] = 0
+        counter[_PIXELS] = 0
+    for t in timers.values():
+        t.reset()
+    for _, reset_report in reports:
+        if reset_report is not None:
+            reset_report()
+
+
+async def console():
+    # Single-letter commands typed into the USB REPL.
+    reader = asyncio.StreamReader(sys.stdin)
+    while True:
+        line = await reader.readline()
+        if isinstance(line, bytes):
+            line = line.decode()
+        cmd = line.strip()
+        if cmd == "p":
+            dump()
+        elif cmd == "r":
+            reset()
+            print("Profiler counters reset")
@@ -0,0 +1,76 @@
+"""Clipping to the visible disc of the round GC9A01 panels.
+
+The panels are 240x240, but only the pixels inside the 120 pixel circle can
+be seen: the corners, about 21% of the screen, are never visible. fill() and
+fill_rect() here draw only the part of an area that lies on the disc, as a
+few horizontal bands. Rows whose visible width differs by at most SLACK
+pixels share one band, so a full-screen fill takes 41 fill_rect calls and
+still skips 20% of the pixels.
+
+Both boards use this module; keep the two copies identical.
+"""
+
+import math
+from array import array
+
+SIZE = 240
+SLACK = 4
+CENTER = SIZE // 2
+
+
+def _bands(size, slack):
+    # (top, height, half width) per band. A pixel is visible when its centre
+    # lies inside the circle: (2x + 1 - size)^2 + (2y + 1 - size)^2 <= size^2.
+    widths = []
+    for y in range(size):
+        dy = 2 * y + 1 - size
+        widths.append(int((math.sqrt(size * size - dy * dy) + 1) / 2))
+    bands = array("h")
+    y = 0
+    while y < size:
+        top = y
+        low = high = widths[y]
+        y += 1
+        while y < size and max(high, widths[y]) - min(low, widths[y]) <= slack:
+            low = min(low, widths[y])
+            high = max(high, widths[y])
+            y += 1
+        bands.extend((top, y - top, high))
+    return bands
+
+
+_BANDS = _bands(SIZE, SLACK)
+
+
+def fill_rect(tft, x, y, w, h, color):
+    """tft.fill_rect() restricted to the visible disc."""
+    right = x + w
+    bottom = y + h
+    bands = _BANDS
+    run_left = run_right = run_top = run_bottom = 0
+    for i in range(0, len(bands), 3):
+        top = bands[i]
+        band_bottom = top + bands[i + 1]
+        if band_bottom <= y:
+            continue
+        if top >= bottom:
+            break
+        half = bands[i + 2]
+        left = max(x, CENTER - half)
+        band_right = min(right, CENTER + half)
+        top = max(top, y)
+        band_bottom = min(band_bottom, bottom)
+        if left == run_left and band_right == run_right and top == run_bottom:
+            # Same columns as the band above: grow that rectangle.
+            run_bottom = band_bottom
+            continue
+        if run_right > run_left:
+            tft.fill_rect(run_left, run_top, run_right - run_left, run_bottom - run_top, color)
+        run_left, run_right, run_top, run_bottom = left, band_right, top, band_bottom
+    if run_right > run_left:
+        tft.fill_rect(run_left, run_top, run_right - run_left, run_bottom - run_top, color)
+
+
+def fill(tft, color):
+    """tft.fill() restricted to the visible disc."""
+    fill_rect(tft, 0, 0, SIZE, SIZE, color)
@@ -0,0 +1,53 @@
+"""Precomputed scanline span tables for the oval and diamond irises.
+
+A span table holds the half-width of a shape on each row, indexed by the
+distance from the centre row, as a compact array('H'). Tables are computed
+once per shape and size and then reused every frame, so drawing an oval or
+diamond is just a walk over the table with no floating point.
+"""
+
+import math
+from array import array
+
+ELLIPSE = 0
+DIAMOND = 1
+
+_tables = {}
+
+
+def ellipse(a, b):
+    key = (ELLIPSE, a, b)
+    table = _tables.get(key)
+    if table is None:
+        table = array("H", bytes(2 * (b + 1)))
+        table[0] = a
+        for y in range(1, b + 1):
+            try:
+                table[y] = int(a * math.sqrt(1 - (y / b) ** 2))
+            except ValueError:
+                table[y] = 0
+        _tables[key] = table
+    return table
+
+
+def diamond(r):
+    key = (DIAMOND, r, r)
+    table = _tables.get(key)
+    if table is None:
+        table = array("H", range(r, -1, -1))
+        _tables[key] = table
+    return table
+
+
+def fill_spans(tft, cx, cy, table, color):
+    # Rows with the same half-width are merged into one fill_rect.
+    n = len(table) - 1
+    y = -n
+    while y <= n:
+        w = table[-y if y < 0 else y]
+        h = 1
+        while y + h <= n and table[abs(y + h)] == w:
+            h += 1
+        if w:
+            tft.fill_rect(cx - w, cy + y, 2 * w, h, color)
+        y += h
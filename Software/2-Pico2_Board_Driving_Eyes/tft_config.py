@@ -7,6 +7,10 @@ Optimized for improved refresh rate by increasing the SPI baudrate.
 
 from machine import Pin, SPI
 import gc9a01
+from framebuffer_display import FramebufferDisplay
+from broadcast_display import BroadcastDisplay
+from dma_pipeline import DmaLink, PipelinedDisplay
+from core1_renderer import Core1Renderer
 
 # ----------------------------------------------------------------------
 # Shared SPI hardware configuration.
@@ -32,6 +36,12 @@ BFA = 0
 WIDE = 0
 TALL = 1
 
+# ----------------------------------------------------------------------
+# Off-screen framebuffer region (x, y, width, height) used when a display is
+# configured with framebuffer=True. It covers the part of the panel the
+# eye animates in; drawing outside it goes straight to the panel.
+FRAMEBUFFER_REGION = (45, 45, 150, 150)
+
 # ----------------------------------------------------------------------
 # Create the SPI instance once.
 # Increase the baudrate for faster refresh rates.
@@ -50,11 +60,40 @@ _cs2    = Pin(CS_PIN2, Pin.OUT)
 _dc2    = Pin(DC_PIN2, Pin.OUT)
 
 # ----------------------------------------------------------------------
-def config1(rotation=0, buffer_size=0, options=0):
+# Both displays share the bus, so they share one DMA link.
+_dma_link = None
+
+def dma_link():
+    global _dma_link
+    if _dma_link is None:
+        _dma_link = DmaLink(spi)
+    return _dma_link
+
+# All drawing moved to core 1 goes through one renderer, so the panels keep
+# sharing the bus in call order.
+_renderer = None
+
+def core1_renderer():
+    global _renderer
+    if _renderer is None:
+        _renderer = Core1Renderer()
+    return _renderer
+
+# The gc9a01.GC9A01 objects made by config1() and config2(), for
+# config_both() to send small writes through.
+_panels = [None, None]
+
+# ----------------------------------------------------------------------
+def config1(rotation=0, buffer_size=0, options=0, framebuffer=False, pipeline=False, core1=False):
     """
     Configure the first display and return an instance of gc9a01.GC9A01.
+    With framebuffer=True the panel is wrapped in a FramebufferDisplay;
+    call show() on it to push each frame. With pipeline=True as well, frames
+    are pushed by DMA while the next one is rendered (PipelinedDisplay).
+    With core1=True (not with pipeline) the panel is drawn on from core 1;
+    start core1_renderer() once the displays are initialised.
     """
-    return gc9a01.GC9A01(
+    tft = gc9a01.GC9A01(
         spi,
         240,
         240,
@@ -65,12 +104,25 @@ def config1(rotation=0, buffer_size=0, options=0):
         options=options,
         buffer_size=buffer_size,
     )
+    _panels[0] = tft
+    if framebuffer and pipeline:
+        return PipelinedDisplay(tft, *FRAMEBUFFER_REGION, dma_link(), (_cs1,), (_dc1,))
+    if core1:
+        tft = core1_renderer().display(tft)
+    if framebuffer:
+        return FramebufferDisplay(tft, *FRAMEBUFFER_REGION)
+    return tft
 
-def config2(rotation=0, buffer_size=0, options=0):
+def config2(rotation=0, buffer_size=0, options=0, framebuffer=False, pipeline=False, core1=False):
     """
     Configure the second display and return an instance of gc9a01.GC9A01.
+    With framebuffer=True the panel is wrapped in a FramebufferDisplay;
+    call show() on it to push each frame. With pipeline=True as well, frames
+    are pushed by DMA while the next one is rendered (PipelinedDisplay).
+    With core1=True (not with pipeline) the panel is drawn on from core 1;
+    start core1_renderer() once the displays are initialised.
     """
-    return gc9a01.GC9A01(
+    tft = gc9a01.GC9A01(
         spi,
         240,
         240,
@@ -81,6 +133,25 @@ def config2(rotation=0, buffer_size=0, options=0):
         options=options,
         buffer_size=buffer_size,
     )
+    _panels[1] = tft
+    if framebuffer and pipeline:
+        return PipelinedDisplay(tft, *FRAMEBUFFER_REGION, dma_link(), (_cs2,), (_dc2,))
+    if core1:
+        tft = core1_renderer().display(tft)
+    if framebuffer:
+        return FramebufferDisplay(tft, *FRAMEBUFFER_REGION)
+    return tft
+
+def config_both(core1=False):
+    """
+    Return a BroadcastDisplay that draws on both displays in one transfer.
+    Both displays must have been configured and initialised first.
+    With core1=True it draws from core 1, like the displays themselves.
+    """
+    tft = BroadcastDisplay(spi, (_cs1, _cs2), (_dc1, _dc2), 240, 240, tuple(_panels))
+    if core1:
+        tft = core1_renderer().display(tft)
+    return tft
 
 
 # ----- DEFINE 25 COLOR SCHEMES (Sclera always black) -----
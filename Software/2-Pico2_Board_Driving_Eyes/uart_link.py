@@ -0,0 +1,106 @@
+"""Binary frames between the eyes and mouth boards over the UART.
+
+    SYNC  type  seq  length  payload...  crc
+
+SYNC is 0xA5. seq counts frames modulo 256, so the receiver can tell how
+many were lost. crc is a CRC-8 (polynomial 0x07) over type, seq, length and
+payload. A frame with a bad length or crc is dropped and the receiver looks
+for the next SYNC, so line noise is never mistaken for a command.
+
+The eyes send one STATE frame with the whole state (color scheme, eyes
+mode) whenever something changed: several changes in a burst go out as one
+frame with the latest values.
+
+Both boards use this module; keep the two copies identical.
+"""
+
+SYNC = 0xA5
+STATE = 1   # payload: color scheme (1..25), eyes mode (101..)
+
+MAX_PAYLOAD = 16
+_HEADER = 4
+
+
+def _crc_table():
+    table = bytearray(256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table[i] = crc
+    return bytes(table)
+
+
+_CRC = _crc_table()
+
+
+def crc8(data, start, end):
+    crc = 0
+    table = _CRC
+    for i in range(start, end):
+        crc = table[crc ^ data[i]]
+    return crc
+
+
+class FrameWriter:
+    def __init__(self, uart):
+        self.uart = uart
+        self.seq = 0
+        self._frame = bytearray(_HEADER + MAX_PAYLOAD + 1)
+
+    def send(self, kind, payload):
+        n = len(payload)
+        f = self._frame
+        f[0] = SYNC
+        f[1] = kind
+        f[2] = self.seq
+        f[3] = n
+        f[_HEADER:_HEADER + n] = payload
+        f[_HEADER + n] = crc8(f, 1, _HEADER + n)
+        self.uart.write(memoryview(f)[:_HEADER + n + 1])
+        self.seq = (self.seq + 1) & 0xFF
+
+
+class FrameParser:
+    """
+    feed() takes bytes as they arrive, in pieces of any size, and returns the
+    complete frames among them as (type, payload) pairs.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self._seq = None   # Sequence number expected next
+        self.frames = 0
+        self.errors = 0    # Bytes skipped while looking for a valid frame
+        self.lost = 0      # Frames missing from the sequence
+
+    def feed(self, data):
+        buf = self._buf + data
+        frames = []
+        pos = 0
+        size = len(buf)
+        while pos < size:
+            if buf[pos] != SYNC:
+                self.errors += 1
+                pos += 1
+                continue
+            if size - pos < _HEADER:
+                break
+            n = buf[pos + 3]
+            end = pos + _HEADER + n + 1
+            if n > MAX_PAYLOAD or (end <= size and crc8(buf, pos + 1, end - 1) != buf[end - 1]):
+                # Not a frame after all: look for the next SYNC.
+                self.errors += 1
+                pos += 1
+                continue
+            if end > size:
+                break
+            seq = buf[pos + 2]
+            if self._seq is not None and seq != self._seq:
+                self.lost += (seq - self._seq) & 0xFF
+            self._seq = (seq + 1) & 0xFF
+            self.frames += 1
+            frames.append((buf[pos + 1], bytes(buf[pos + _HEADER:end - 1])))
+            pos = end
+        self._buf = buf[pos:]
+        return frames
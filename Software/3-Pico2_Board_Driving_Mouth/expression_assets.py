@@ -0,0 +1,189 @@
+"""Mouth expressions stored as binary files on the board's filesystem.
+
+Each expression is one file, ASSET_DIR/<name>.bin:
+
+    offset   size  field
+    0        4     magic b"FMX2"
+    4        2     width, little-endian
+    6        2     height, little-endian
+    8        1     bits per pixel: 4 or 8
+    9        1     palette size n (1..255)
+    10       1     encoding: PACKED or RLE
+    11       2n    palette, RGB565 big-endian as the panel wants it
+    11+2n    ...   pixels
+
+PACKED pixels are the palette indexes row by row, (width * bits + 7) // 8
+bytes per row; with 4 bits the left pixel is the high nibble.
+
+RLE pixels are a stream of codes, every row starting on a new code:
+
+    0xFF         (first code of a row only) the row repeats the previous one
+    0x80 | n-1   run: n pixels (1..127) of the index in the next byte
+    n-1          literal: n pixels (1..128) follow, packed as in PACKED
+
+The indexes are in framebuf's GS4_HMSB or GS8 layout and the palette is a
+one-row RGB565 framebuf, so framebuf.blit() turns indexes into colors. It
+copies the palette's two bytes per color as they are, so the colors come out
+in the panel's byte order even though framebuf's RGB565 is little-endian.
+
+The files are built on a PC from expressions.py or PNG images, see
+Software/4-Host_Emulator/build_expressions.py.
+"""
+
+import framebuf
+from array import array
+
+ASSET_DIR = "mouths"
+MAGIC = b"FMX2"
+HEADER_SIZE = 11
+
+PACKED = 0
+RLE = 1
+
+REPEAT = 0xFF
+RUN = 0x80
+
+_FORMATS = {4: framebuf.GS4_HMSB, 8: framebuf.GS8}
+
+# Files are found next to this module: on the board that is the root of the
+# filesystem (__file__ has no directory part), on a PC the firmware directory.
+_BASE = __file__[:__file__.rfind("/") + 1]
+
+
+def path(name):
+    return "{}{}/{}.bin".format(_BASE, ASSET_DIR, name)
+
+
+class Expression:
+    __slots__ = ("name", "width", "height", "bits", "colors", "encoding", "start",
+                 "data", "palette", "pixels", "image")
+
+    def __init__(self, name, data):
+        if data[:4] != MAGIC:
+            raise ValueError(name + ": not an expression file")
+        width = data[4] | data[5] << 8
+        height = data[6] | data[7] << 8
+        bits = data[8]
+        colors = data[9]
+        encoding = data[10]
+        if bits not in _FORMATS or colors == 0 or encoding not in (PACKED, RLE):
+            raise ValueError(name + ": unsupported format")
+        start = HEADER_SIZE + 2 * colors
+        if encoding == PACKED and len(data) != start + (width * bits + 7) // 8 * height:
+            raise ValueError(name + ": wrong file size")
+        self.name = name
+        self.width = width
+        self.height = height
+        self.bits = bits
+        self.colors = colors
+        self.encoding = encoding
+        self.start = start   # Offset of the pixels in data
+        self.data = data
+        view = memoryview(data)
+        # Blit palette: color i at pixel (i, 0).
+        self.palette = framebuf.FrameBuffer(view[HEADER_SIZE:start], colors, 1, framebuf.RGB565)
+        self.pixels = None
+        if encoding == PACKED:
+            self.pixels = framebuf.FrameBuffer(view[start:], width, height, _FORMATS[bits])
+        self.image = None   # RGB565 pixels once decoded
+
+    def color(self, index):
+        # Palette color as gc9a01 takes it (fill_rect, hline, ...).
+        o = HEADER_SIZE + 2 * index
+        return self.data[o] << 8 | self.data[o + 1]
+
+
+class RowDecoder:
+    """
+    Expands an expression one row at a time into buffer, RGB565 rows of the
+    expression's width (one row or more).
+
+    next(y) decodes the following row into row y of the buffer and returns
+    how many runs of at least long_run pixels it had; runs then holds their
+    (x, length, palette index) triples, so a caller can draw them as lines
+    instead of pixels. A row that repeats the previous one returns that
+    row's count and runs.
+    """
+
+    def __init__(self, expression, buffer, long_run=0):
+        self.expression = expression
+        width = expression.width
+        self.buffer = buffer
+        self.fb = framebuf.FrameBuffer(buffer, width, len(buffer) // (2 * width), framebuf.RGB565)
+        self.long_run = long_run if long_run > 0 else width + 1
+        self.runs = array("h", bytes(6 * (width // self.long_run + 1)))
+        self.count = 0
+        self._pos = expression.start
+        self._row = -1
+        self._y = 0
+
+    def next(self, y):
+        e = self.expression
+        fb = self.fb
+        self._row += 1
+        if e.encoding == PACKED:
+            # Blitting from y - row puts that row of the expression at y.
+            fb.blit(e.pixels, 0, y - self._row, -1, e.palette)
+            return 0
+        data = e.data
+        pos = self._pos
+        width = e.width
+        if self._row > 0 and data[pos] == REPEAT:
+            self._pos = pos + 1
+            if y != self._y:
+                n = 2 * width
+                self.buffer[y * n:(y + 1) * n] = memoryview(self.buffer)[self._y * n:(self._y + 1) * n]
+                self._y = y
+            return self.count
+        view = memoryview(data)
+        palette = e.palette
+        bits = e.bits
+        fmt = _FORMATS[bits]
+        long_run = self.long_run
+        runs = self.runs
+        count = 0
+        x = 0
+        while x < width:
+            code = data[pos]
+            if code & RUN:
+                n = (code & 0x7F) + 1
+                index = data[pos + 1]
+                pos += 2
+                fb.hline(x, y, n, palette.pixel(index, 0))
+                if n >= long_run:
+                    runs[3 * count] = x
+                    runs[3 * count + 1] = n
+                    runs[3 * count + 2] = index
+                    count += 1
+            else:
+                n = code + 1
+                size = (n * bits + 7) // 8
+                fb.blit((view[pos + 1:pos + 1 + size], n, 1, fmt), x, y, -1, palette)
+                pos += 1 + size
+            x += n
+        self._pos = pos
+        self._y = y
+        self.count = count
+        return count
+
+
+def load(name):
+    """Read ASSET_DIR/<name>.bin into an Expression."""
+    with open(path(name), "rb") as f:
+        data = bytearray(f.read())
+    return Expression(name, data)
+
+
+def decode(expression):
+    """
+    Expand the expression into expression.image, RGB565 in the panel's byte
+    order for one blit_buffer() call, and drop the file data.
+    """
+    image = bytearray(2 * expression.width * expression.height)
+    decoder = RowDecoder(expression, image)
+    for row in range(expression.height):
+        decoder.next(row)
+    expression.image = image
+    expression.data = None
+    expression.palette = None
+    expression.pixels = None
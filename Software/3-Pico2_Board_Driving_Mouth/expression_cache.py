@@ -0,0 +1,54 @@
+"""LRU cache of decoded mouth expressions.
+
+Expressions are read from their files only when a mouth mode needs one.
+get() returns the expression decoded to RGB565, ready for a single
+blit_buffer() call, and keeps it as long as the decoded images together fit
+in the byte budget; the least recently shown ones are evicted first.
+
+Eviction happens before the new image is allocated, followed by
+gc.collect(), so the heap never holds more than the budget plus the one
+expression file being decoded.
+"""
+
+import gc
+import expression_assets
+
+
+class ExpressionCache:
+    def __init__(self, budget):
+        self.budget = budget
+        self.used = 0
+        self._expressions = {}
+        self._order = []     # Names, least recently used first
+
+    def get(self, name):
+        """
+        Return the Expression for name. Its image is decoded unless that
+        alone would exceed the budget; then only its rows can be drawn.
+        """
+        expression = self._expressions.get(name)
+        if expression is not None:
+            order = self._order
+            if order[-1] != name:
+                order.remove(name)
+                order.append(name)
+            return expression
+        expression = expression_assets.load(name)
+        size = 2 * expression.width * expression.height
+        if size > self.budget:
+            return expression
+        self._make_room(size)
+        expression_assets.decode(expression)
+        self._expressions[name] = expression
+        self._order.append(name)
+        self.used += size
+        return expression
+
+    def _make_room(self, size):
+        evicted = False
+        while self.used + size > self.budget:
+            name = self._order.pop(0)
+            self.used -= len(self._expressions.pop(name).image)
+            evicted = True
+        if evicted:
+            gc.collect()
@@ -4,9 +4,12 @@ import tft_config
 import gc9a01
 from machine import UART, Pin
 from tft_config import config, colorSchemes
-from expressions import *
 import random
 import math
+import round_panel
+import uart_link
+import expression_assets
+from expression_cache import ExpressionCache
 
 bitmap_drawn = False
 prev_mouthMode = None
@@ -19,13 +22,11 @@ adc_pin    = machine.Pin(26)
 adc        = machine.ADC(adc_pin)
 
 # --- Define expressions list ---
-expressions = [
-    (mouth_anger_bitmap, mouth_anger_palette),
-    (mouth_disgust_bitmap, mouth_disgust_palette),
-    (mouth_smile_bitmap, mouth_smile_palette),
-    (mouth_dracula_bitmap, mouth_dracula_palette),
-    (mouth_love_bitmap, mouth_love_palette),
-]
+# Files in expression_assets.ASSET_DIR, for mouthMode 102 to 106. They are
+# only read when their mode is selected.
+EXPRESSION_NAMES = ("anger", "disgust", "smile", "dracula", "love")
+EXPRESSION_CACHE_BUDGET = 64 * 1024  # Maximum bytes held by decoded expressions (28,800 each)
+expression_cache = ExpressionCache(EXPRESSION_CACHE_BUDGET)
 
 def blend_with_black(base_color, ratio):
     r5 = (base_color >> 11) & 0x1F
@@ -148,22 +149,69 @@ mouthMode = 101
 prev_half_bars = [-1] * 7
 prev_ring_colors = [None] * 7
 
-def draw_bitmap(bitmap, palette, width, height, mode):
+# A decoded expression goes to the panel in one blit_buffer call. One that
+# does not fit in the cache is drawn a row at a time, as it is decoded.
+LONG_RUN = 64   # Runs of one color at least this long are drawn as lines
+row_pixels = bytearray(2 * TOTAL_WIDTH)
+
+def draw_rows(expression, x, y, bg_color):
+    # Consecutive rows of a single color become one fill_rect, other long
+    # runs an hline, and the pixels in between go in blit_buffer calls. Runs
+    # of bg_color are skipped: the panel already shows them.
+    width = expression.width
+    row_buffer = memoryview(row_pixels)[:2 * width]
+    decoder = expression_assets.RowDecoder(expression, row_buffer, LONG_RUN)
+    runs = decoder.runs
+    band_y = y
+    band_h = 0
+    band_color = bg_color
+    for row in range(expression.height):
+        count = decoder.next(0)
+        if count == 1 and runs[1] == width:
+            color = expression.color(runs[2])
+            if band_h and color == band_color:
+                band_h += 1
+                continue
+            if band_h and band_color != bg_color:
+                tft.fill_rect(x, band_y, width, band_h, band_color)
+            band_y = y + row
+            band_h = 1
+            band_color = color
+            continue
+        if band_h and band_color != bg_color:
+            tft.fill_rect(x, band_y, width, band_h, band_color)
+        band_h = 0
+        start = 0
+        for k in range(count):
+            run_x = runs[3 * k]
+            run_n = runs[3 * k + 1]
+            if run_x > start:
+                tft.blit_buffer(row_buffer[2 * start:2 * run_x], x + start, y + row, run_x - start, 1)
+            color = expression.color(runs[3 * k + 2])
+            if color != bg_color:
+                tft.hline(x + run_x, y + row, run_n, color)
+            start = run_x + run_n
+        if start < width:
+            tft.blit_buffer(row_buffer[2 * start:], x + start, y + row, width - start, 1)
+    if band_h and band_color != bg_color:
+        tft.fill_rect(x, band_y, width, band_h, band_color)
+
+def draw_bitmap(expression, mode):
     if mode == 106:
         bg_color = gc9a01.color565(255, 192, 203)  # Light pink
     else:
         bg_color = gc9a01.color565(0, 0, 0)  # Black
     
-    tft.fill(bg_color)  
+    round_panel.fill(tft, bg_color)
     
+    width = expression.width
+    height = expression.height
     start_x = (TOTAL_WIDTH - width) // 2
     start_y = (TOTAL_HEIGHT - height) // 2
-    for row in range(height):
-        for col in range(width):
-            idx = bitmap[row][col]  # Correct for 2D list
-            r, g, b = palette[idx]
-            color = gc9a01.color565(r, g, b)
-            tft.pixel(start_x + col, start_y + row, color)
+    if expression.image is not None:
+        tft.blit_buffer(expression.image, start_x, start_y, width, height)
+    else:
+        draw_rows(expression, start_x, start_y, bg_color)
 
 # ----- Visualization Functions -----
 async def update_bars(levels):
@@ -176,7 +224,7 @@ async def update_bars(levels):
 
         if half_bar != prev_half_bars[i]:
             x = MARGIN_X + i * (BAR_WIDTH + SPACING)
-            tft.fill_rect(x, MARGIN_Y, BAR_WIDTH, AVAILABLE_HEIGHT, BLACK)
+            round_panel.fill_rect(tft, x, MARGIN_Y, BAR_WIDTH, AVAILABLE_HEIGHT, BLACK)
             y = CENTER_Y - half_bar
             height = half_bar * 2
             tft.fill_rect(x, y, BAR_WIDTH, height, current_color_scheme[i])
@@ -185,52 +233,55 @@ async def update_bars(levels):
 # ----- UART SETUP -----
 uart = UART(0, baudrate=115200, rx=Pin(17))
 
-def extract_commands(text):
-    commands = []
-    parts = text.split()
-    for part in parts:
-        if part.startswith("C") and part[1:].isdigit():
-            commands.append(('color', int(part[1:])))
-        elif part.startswith("M") and part[1:].isdigit():
-            commands.append(('mouth', int(part[1:])))
-    return commands
+link = uart_link.FrameParser()
+eyes_mode = 101   # The eyes board starts in mode 101 too
 
-async def uart_receive():
-    global ColScheme, current_color_scheme, mouthMode, prev_half_bars, last_random_mouth_mode
+def apply_state(payload):
+    global ColScheme, current_color_scheme, mouthMode, prev_half_bars, last_random_mouth_mode, eyes_mode
     valid_modes = [101, 102, 103, 104, 105, 107]
+    color, mode = payload[0], payload[1]
+
+    if 1 <= color <= 25 and color != ColScheme:
+        ColScheme = color
+        current_color_scheme = colorSchemes[ColScheme]
+        prev_half_bars = [-1] * 7
+        print("UART set ColScheme:", ColScheme)
+
+    # The state is sent whole: only a new eyes mode picks a new mouth.
+    if mode != eyes_mode:
+        eyes_mode = mode
+        if mode == 106:
+            mouthMode = 106  # special case: allow directly
+            print("UART set mouthMode:", mouthMode)
+        elif mode in valid_modes:
+            new_mode = random.choice(
+                [m for m in valid_modes if m != last_random_mouth_mode]
+            )
+            last_random_mouth_mode = new_mode
+            mouthMode = new_mode
+            print("UART randomized mouthMode to:", mouthMode)
+
+async def uart_receive():
+    # The reader sleeps until bytes arrive, so a frame is acted on as soon
+    # as it is complete.
+    reader = asyncio.StreamReader(uart)
 
     while True:
-        if uart.any():
-            try:
-                data = uart.readline()
-                if data:
-                    text = data.decode().strip()
-                    print("Received:", repr(text))
-                    commands = extract_commands(text)
-                    for cmd, value in commands:
-                        if cmd == 'color' and 1 <= value <= 25:
-                            ColScheme = value
-                            current_color_scheme = colorSchemes[ColScheme]
-                            prev_half_bars = [-1] * 7
-                            print("UART set ColScheme:", ColScheme)
-
-                        elif cmd == 'mouth':
-                            if value == 106:
-                                mouthMode = 106  # special case: allow directly
-                                print("UART set mouthMode:", mouthMode)
-                            elif value in valid_modes:
-                                new_mode = random.choice(
-                                    [m for m in valid_modes if m != last_random_mouth_mode]
-                                )
-                                last_random_mouth_mode = new_mode
-                                mouthMode = new_mode
-                                print("UART randomized mouthMode to:", mouthMode)
-
-
-            except Exception as e:
-                print("UART error:", e)
-
-        await asyncio.sleep(0.1)
+        data = await reader.read(32)
+        if not data:
+            continue
+        lost = link.lost
+        errors = link.errors
+        try:
+            for kind, payload in link.feed(data):
+                if kind == uart_link.STATE and len(payload) >= 2:
+                    apply_state(payload)
+        except Exception as e:
+            print("UART error:", e)
+        # Only a damaged or lost frame is worth a line.
+        if link.lost != lost or link.errors != errors:
+            print("UART link: {} frames, {} lost, {} bytes skipped".format(
+                link.frames, link.lost, link.errors))
 
 # ----- Main Loop -----
 async def main():
@@ -240,7 +291,7 @@ async def main():
         levels = await read_msgeq7()
 
         if mouthMode != prev_mouthMode:
-            tft.fill(BLACK)
+            round_panel.fill(tft, BLACK)
             bitmap_drawn = False
             prev_mouthMode = mouthMode
 
@@ -249,9 +300,8 @@ async def main():
 
         elif mouthMode in [102, 103, 104, 105, 106] and not bitmap_drawn:
             index = mouthMode - 102
-            if index < len(expressions):
-                bitmap, palette = expressions[index]
-                draw_bitmap(bitmap, palette, 120, 120, mouthMode)
+            if index < len(EXPRESSION_NAMES):
+                draw_bitmap(expression_cache.get(EXPRESSION_NAMES[index]), mouthMode)
                 bitmap_drawn = True
                 
         elif mouthMode == 107:
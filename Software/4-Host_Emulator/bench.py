@@ -0,0 +1,296 @@
+"""Benchmark the eyes drawing code for every eye mode and color scheme.
+
+    python bench.py --out baseline.json
+    python bench.py --compare baseline.json
+    python bench.py --modes 105 106 107 --set RENDER_FRAMEBUFFER=True
+
+For each eyesMode (101-107) and color scheme (1-25) the eyes firmware is
+driven through the same scripted sequence on the emulator:
+
+    sclera  draw_sclera() on both eyes
+    iris    the first render_iris() on both eyes
+    move    animate_eyes() through a fixed list of movements
+    blink   blink_eyes()
+
+and every phase records the draw calls made by the firmware, the pixels
+they cover (fill_circle estimated as pi r^2), the SPI bytes and transfers
+and an estimated wall time: SPI time at the bus baud rate plus a fixed cost
+per transfer (--transfer-us) for the call, CS/DC and window setup. Move is
+also reported per frame.
+
+With --compare the run is checked against a saved result: any metric that
+grew by more than --tolerance in any mode fails the run (exit status 1).
+"""
+
+import argparse
+import ast
+import json
+import random
+import sys
+from array import array
+
+from frontman_emu import Board, clock
+from frontman_emu.board import use_stand_ins
+
+MODES = (101, 102, 103, 104, 105, 106, 107)
+SCHEMES = tuple(range(1, 26))
+PHASES = ("sclera", "iris", "move", "blink")
+METRICS = ("calls", "pixels", "bytes", "transfers", "est_ms")
+COMPARED = ("calls", "pixels", "bytes", "est_ms")
+
+DEFAULT_TRANSFER_US = 10.0
+DEFAULT_MOVES = 12
+
+
+class Meter:
+    def __init__(self, profiler, spi, transfer_us):
+        self.profiler = profiler
+        self.spi = spi
+        self.transfer_us = transfer_us
+
+    def reset(self):
+        self.profiler.reset()
+        self.spi.reset_counters()
+
+    def read(self):
+        calls = sum(c[0] for c in self.profiler.primitives.values())
+        pixels = sum(c[1] for c in self.profiler.primitives.values())
+        spi = self.spi
+        return {
+            "calls": calls,
+            "pixels": pixels,
+            "bytes": spi.bytes,
+            "transfers": spi.transfers,
+            "est_ms": round((spi.busy_us + spi.transfers * self.transfer_us) / 1000, 3),
+        }
+
+
+def script(seed, moves):
+    # The same movements for every mode and scheme.
+    rng = random.Random(seed)
+    steps = []
+    for _ in range(moves):
+        target = (120 + rng.randint(-40, 40), 120 + rng.randint(-40, 40), rng.randint(24, 40))
+        r = rng.random()
+        if r < 0.7:
+            targets = (target, target)
+        elif r < 0.85:
+            targets = (None, target)
+        else:
+            targets = (target, None)
+        steps.append((rng.randint(5, 10), targets))
+    return steps
+
+
+class Bench:
+    def __init__(self, settings, transfer_us, baudrate=None):
+        use_stand_ins()
+        import machine
+        machine.SPI.baudrate_override = baudrate
+        machine.SPI.charge_time = False   # Never drop frames: count every step
+        self.board = Board("eyes")
+        self.main = self.board.load()
+        self.board.entry.close()
+        self.board.configure(**settings)
+        m = self.main
+        tft_config = self.board.module("tft_config")
+        profiler = self.board.module("profiler")
+        # In the board's context, so hardware made here (DMA) is the board's.
+        ctx = self.board.context()
+        self.tft1 = profiler.CountingDisplay(ctx.run(
+            tft_config.config1, 0, framebuffer=m.RENDER_FRAMEBUFFER, pipeline=m.RENDER_PIPELINE))
+        self.tft2 = profiler.CountingDisplay(ctx.run(
+            tft_config.config2, 0, framebuffer=m.RENDER_FRAMEBUFFER, pipeline=m.RENDER_PIPELINE))
+        self.tft1.init()
+        self.tft2.init()
+        m.tft_both = profiler.CountingDisplay(ctx.run(tft_config.config_both))
+        self.meter = Meter(profiler, tft_config.spi, transfer_us)
+        self.loop = clock.VirtualLoop()
+
+    def close(self):
+        self.loop.close()
+
+    def run_case(self, mode, scheme, moves, seed):
+        m = self.main
+        tft1 = self.tft1
+        tft2 = self.tft2
+        meter = self.meter
+        m.eyesMode = mode
+        m.counter = scheme
+        m.use_current_scheme()
+        m.iris_cache.clear()
+        m.iris_on_screen.clear()
+        m.random.seed(seed)
+        result = {}
+
+        meter.reset()
+        m.draw_sclera(tft1)
+        m.draw_sclera(tft2)
+        self.loop.run_until_complete(m.present(tft1, tft2))
+        result["sclera"] = meter.read()
+
+        s1 = array("h", (m.cx, m.cy, m.base_iris_radius))
+        s2 = array("h", s1)
+        meter.reset()
+        m.render_iris(tft1, *s1)
+        m.render_iris(tft2, *s2)
+        self.loop.run_until_complete(m.present(tft1, tft2))
+        result["iris"] = meter.read()
+
+        async def move():
+            for steps, (target1, target2) in script(seed, moves):
+                await m.animate_eyes(tft1, s1, tft2, s2, steps, target1, target2)
+
+        meter.reset()
+        m.frames.reset()
+        self.loop.run_until_complete(move())
+        move_result = meter.read()
+        frames = m.frames.stats[mode][0]
+        move_result["frames"] = frames
+        for k in METRICS:
+            move_result[k + "_per_frame"] = round(move_result[k] / frames, 3)
+        result["move"] = move_result
+
+        meter.reset()
+        self.loop.run_until_complete(m.blink_eyes(tft1, s1, tft2, s2, 0))
+        result["blink"] = meter.read()
+        return result
+
+
+def summarize(results):
+    # Mean over the color schemes of every metric, per mode and phase.
+    summary = {}
+    for mode, schemes in results.items():
+        per_phase = {}
+        for phase in PHASES:
+            rows = [r[phase] for r in schemes.values()]
+            per_phase[phase] = {k: round(sum(r[k] for r in rows) / len(rows), 3) for k in rows[0]}
+        summary[mode] = per_phase
+    return summary
+
+
+def print_summary(summary):
+    print("mode | move/frame: calls    pixels    bytes   est ms | sclera ms | iris ms | blink ms")
+    for mode in sorted(summary):
+        s = summary[mode]
+        mv = s["move"]
+        print("{:>4} | {:17.1f} {:9.0f} {:8.0f} {:8.3f} | {:9.3f} | {:7.3f} | {:8.3f}".format(
+            mode, mv["calls_per_frame"], mv["pixels_per_frame"], mv["bytes_per_frame"],
+            mv["est_ms_per_frame"], s["sclera"]["est_ms"], s["iris"]["est_ms"], s["blink"]["est_ms"]))
+
+
+def compare(results, baseline, tolerance):
+    # Every case present in both runs; returns the list of regressions.
+    regressions = []
+    base_results = baseline["results"]
+    for mode, schemes in results.items():
+        for scheme, phases in schemes.items():
+            base_phases = base_results.get(mode, {}).get(scheme)
+            if base_phases is None:
+                continue
+            for phase, metrics in phases.items():
+                keys = COMPARED + tuple(k + "_per_frame" for k in COMPARED) if phase == "move" else COMPARED
+                for k in keys:
+                    old = base_phases[phase].get(k)
+                    new = metrics.get(k)
+                    if old is None or new is None:
+                        continue
+                    if new > old * (1 + tolerance) and new - old > 1e-6:
+                        regressions.append((mode, scheme, phase, k, old, new))
+    return regressions
+
+
+def print_comparison(summary, base_summary):
+    print("mode | move est ms/frame: base -> now      | move bytes/frame: base -> now")
+    for mode in sorted(summary):
+        if mode not in base_summary:
+            continue
+        now = summary[mode]["move"]
+        old = base_summary[mode]["move"]
+        print("{:>4} | {:10.3f} -> {:8.3f} ({:+6.1f}%) | {:9.0f} -> {:8.0f} ({:+6.1f}%)".format(
+            mode, old["est_ms_per_frame"], now["est_ms_per_frame"],
+            _change(old["est_ms_per_frame"], now["est_ms_per_frame"]),
+            old["bytes_per_frame"], now["bytes_per_frame"],
+            _change(old["bytes_per_frame"], now["bytes_per_frame"])))
+
+
+def _change(old, new):
+    return (new - old) * 100 / old if old else 0.0
+
+
+def parse_setting(text):
+    name, _, value = text.partition("=")
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every eye mode and color scheme.")
+    parser.add_argument("--modes", type=int, nargs="+", default=MODES)
+    parser.add_argument("--schemes", type=int, nargs="+", default=SCHEMES)
+    parser.add_argument("--moves", type=int, default=DEFAULT_MOVES, help="movements per case")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--baud", type=int, help="SPI baud rate (default: what tft_config asks for)")
+    parser.add_argument("--transfer-us", type=float, default=DEFAULT_TRANSFER_US,
+                        help="estimated fixed cost of one SPI transfer in microseconds")
+    parser.add_argument("--set", type=parse_setting, action="append", default=[],
+                        metavar="NAME=VALUE", help="change a main.py setting")
+    parser.add_argument("--out", help="write the results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail on regressions against a saved result")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="allowed relative growth per metric with --compare (default 0.02)")
+    args = parser.parse_args()
+
+    settings = dict(args.set)
+    bench = Bench(settings, args.transfer_us, args.baud)
+    results = {}
+    try:
+        for mode in args.modes:
+            results[str(mode)] = {}
+            for scheme in args.schemes:
+                results[str(mode)][str(scheme)] = bench.run_case(
+                    mode, scheme, args.moves, args.seed * 1000 + mode * 100 + scheme)
+    finally:
+        bench.close()
+        clock.uninstall()
+
+    summary = summarize(results)
+    report = {
+        "config": {
+            "moves": args.moves,
+            "seed": args.seed,
+            "baudrate": args.baud or bench.meter.spi.baudrate,
+            "transfer_us": args.transfer_us,
+            "settings": {k: repr(v) for k, v in settings.items()},
+        },
+        "summary": summary,
+        "results": results,
+    }
+    print_summary(summary)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+        print("Wrote", args.out)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline["config"]["moves"] != args.moves or baseline["config"]["seed"] != args.seed:
+            print("Baseline was recorded with different --moves/--seed; results are not comparable")
+            sys.exit(2)
+        print_comparison(summary, baseline["summary"])
+        regressions = compare(results, baseline, args.tolerance)
+        for mode, scheme, phase, key, old, new in regressions[:50]:
+            print("REGRESSION mode {} scheme {} {} {}: {} -> {}".format(mode, scheme, phase, key, old, new))
+        if len(regressions) > 50:
+            print("... and {} more".format(len(regressions) - 50))
+        if regressions:
+            sys.exit(1)
+        print("No regressions above {:.0%}".format(args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""Build the mouth expression files.
+
+    python build_expressions.py                       convert expressions.py
+    python build_expressions.py --png art/*.png       convert PNG images
+    python build_expressions.py --export-png art/     expressions.py as PNGs
+
+Each expression becomes <name>.bin in the mouth firmware's mouths directory
+(or --out), in the format read by expression_assets.py, PACKED or RLE,
+whichever is smaller. Copy the mouths directory to the board together with
+the firmware.
+
+The mouth_<name>_bitmap / mouth_<name>_palette pairs of expressions.py are
+converted as they are. PNG images (8-bit RGB or RGBA, named <name>.png)
+first have their colors merged where the panel shows them the same (equal
+RGB565); if more than --colors are left, they are reduced by median cut and
+every pixel takes the nearest remaining color. An image with few enough
+colors therefore converts losslessly.
+
+Every file is read back with the firmware's own expression_assets.py and
+drawn with its main.py on the emulator, and both the decoded image and the
+panel are compared pixel for pixel with the expression it was built from;
+names that are also in expressions.py are compared with expressions.py too.
+Any difference fails the build (exit status 1) before anything is written,
+so the files in the output directory are only replaced by a build that
+passes. manifest.json in the output directory lists for every expression
+the file size with both encodings, the RAM a decoded copy takes and the
+estimated cost of drawing it (SPI transfers, bytes and time, as in
+bench.py) drawn row by row and from the cache.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import struct
+import sys
+
+from frontman_emu import Board, clock, png
+from frontman_emu.board import BOARDS
+from bench import DEFAULT_TRANSFER_US
+
+MOUTH_DIR = BOARDS["mouth"]
+ASSET_DIR = os.path.join(MOUTH_DIR, "mouths")
+MAX_COLORS = 16   # 4 bits per pixel
+
+
+MAGIC = b"FMX2"
+PACKED = 0
+RLE = 1
+REPEAT = 0xFF
+RUN = 0x80
+MAX_RUN = 127
+MAX_LITERAL = 128
+MIN_RUN = 6   # Shorter runs cost less as part of a literal
+
+
+def color565(r, g, b):
+    # Same packing as gc9a01.color565().
+    return (r & 0xF8) << 8 | (g & 0xFC) << 3 | b >> 3
+
+
+def pack(indexes, bits):
+    # Indexes as PACKED stores them: bytes, or two per byte high nibble first.
+    if bits == 8:
+        return bytes(indexes)
+    padded = list(indexes) + [0] * (len(indexes) & 1)
+    return bytes(padded[i] << 4 | padded[i + 1] for i in range(0, len(padded), 2))
+
+
+def rle_row(row, bits):
+    out = bytearray()
+    literal = []
+
+    def flush():
+        for i in range(0, len(literal), MAX_LITERAL):
+            chunk = literal[i:i + MAX_LITERAL]
+            out.append(len(chunk) - 1)
+            out.extend(pack(chunk, bits))
+        del literal[:]
+
+    x = 0
+    while x < len(row):
+        end = x
+        while end < len(row) and row[end] == row[x] and end - x < MAX_RUN:
+            end += 1
+        if end - x >= MIN_RUN:
+            flush()
+            out.append(RUN | (end - x - 1))
+            out.append(row[x])
+        else:
+            literal.extend(row[x:end])
+        x = end
+    flush()
+    return bytes(out)
+
+
+def encode_pixels(bitmap, bits, encoding):
+    if encoding == PACKED:
+        return b"".join(pack(row, bits) for row in bitmap)
+    out = bytearray()
+    previous = None
+    for row in bitmap:
+        out += bytes((REPEAT,)) if row == previous else rle_row(row, bits)
+        previous = row
+    return bytes(out)
+
+
+def encode(palette, bitmap, encoding=None):
+    # palette: (r, g, b) tuples; bitmap: rows of palette indexes. Without an
+    # encoding, the smaller of PACKED and RLE is used.
+    height = len(bitmap)
+    width = len(bitmap[0])
+    if not 0 < len(palette) < 256:
+        raise ValueError("palette needs 1..255 colors, has {}".format(len(palette)))
+    bits = 4 if len(palette) <= 16 else 8
+    for row in bitmap:
+        if len(row) != width:
+            raise ValueError("rows differ in length")
+        if max(row) >= len(palette):
+            raise ValueError("index {} outside the palette".format(max(row)))
+    if encoding is None:
+        packed = encode_pixels(bitmap, bits, PACKED)
+        rle = encode_pixels(bitmap, bits, RLE)
+        encoding, pixels = (RLE, rle) if len(rle) < len(packed) else (PACKED, packed)
+    else:
+        pixels = encode_pixels(bitmap, bits, encoding)
+    out = bytearray(MAGIC)
+    out += struct.pack("<HHBBB", width, height, bits, len(palette), encoding)
+    for r, g, b in palette:
+        # Panel byte order: framebuf.blit() copies the two bytes unchanged.
+        out += struct.pack(">H", color565(r, g, b))
+    return bytes(out + pixels)
+
+
+def load_expressions(path):
+    # {name: (palette, bitmap)} from the mouth_<name>_palette/_bitmap pairs.
+    spec = importlib.util.spec_from_file_location("expressions", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    found = {}
+    for attr in dir(module):
+        if attr.startswith("mouth_") and attr.endswith("_bitmap"):
+            name = attr[len("mouth_"):-len("_bitmap")]
+            found[name] = (getattr(module, "mouth_{}_palette".format(name)), getattr(module, attr))
+    return found
+
+
+def rgb565(palette, bitmap):
+    # The image as the panel shows it: RGB565 high byte first.
+    colors = [struct.pack(">H", color565(*c)) for c in palette]
+    return b"".join(colors[i] for row in bitmap for i in row)
+
+
+# ----- PNG images -----
+
+def median_cut(counts, max_colors):
+    # counts: {(r, g, b): pixels}. Returns at most max_colors colors.
+    boxes = [sorted(counts)]
+    while len(boxes) < max_colors:
+        best = None
+        for box in boxes:
+            if len(box) < 2:
+                continue
+            for ch in range(3):
+                spread = max(c[ch] for c in box) - min(c[ch] for c in box)
+                if best is None or spread > best[0]:
+                    best = (spread, box, ch)
+        if best is None:
+            break
+        _, box, ch = best
+        box.sort(key=lambda c: c[ch])
+        # Split at the median pixel, keeping both halves non-empty.
+        total = sum(counts[c] for c in box)
+        seen = 0
+        cut = 1
+        for i, c in enumerate(box[:-1]):
+            seen += counts[c]
+            cut = i + 1
+            if 2 * seen >= total:
+                break
+        boxes.remove(box)
+        boxes += [box[:cut], box[cut:]]
+    palette = []
+    for box in boxes:
+        n = sum(counts[c] for c in box)
+        palette.append(tuple((sum(c[ch] * counts[c] for c in box) + n // 2) // n for ch in range(3)))
+    return palette
+
+
+def from_png(path, max_colors):
+    # Returns (palette, bitmap, colors): colors is the number of RGB565
+    # colors in the image, so colors <= len(palette) means lossless.
+    width, height, rgb = png.read(path)
+    pixels = [tuple(rgb[i:i + 3]) for i in range(0, len(rgb), 3)]
+    # One representative per color the panel can tell apart.
+    first = {}
+    counts = {}
+    for c in pixels:
+        key = color565(*c)
+        rep = first.setdefault(key, c)
+        counts[rep] = counts.get(rep, 0) + 1
+    reps = sorted(counts, key=lambda c: -counts[c])
+    if len(reps) <= max_colors:
+        palette = reps
+        index = {key: reps.index(rep) for key, rep in first.items()}
+        lookup = lambda c: index[color565(*c)]
+    else:
+        palette = median_cut(counts, max_colors)
+        nearest = {}
+
+        def lookup(c):
+            i = nearest.get(c)
+            if i is None:
+                i = min(range(len(palette)), key=lambda k: sum((a - b) ** 2 for a, b in zip(c, palette[k])))
+                nearest[c] = i
+            return i
+    flat = [lookup(c) for c in pixels]
+    bitmap = [flat[y * width:(y + 1) * width] for y in range(height)]
+    return palette, bitmap, len(reps)
+
+
+def write_png(path, palette, bitmap):
+    rgb = bytes(v for row in bitmap for i in row for v in palette[i])
+    png.write(path, len(bitmap[0]), len(bitmap), rgb)
+
+
+# ----- Checking on the emulator -----
+
+class Checker:
+    """Reads the files back and draws them with the mouth firmware."""
+
+    def __init__(self, transfer_us):
+        self.transfer_us = transfer_us
+        self.board = Board("mouth")
+        self.main = self.board.load()
+        self.board.entry.close()
+        self.assets = self.board.module("expression_assets")
+        self.spi = self.board.get("spi")
+        self.panel = self.board.panels()[0]
+
+    def close(self):
+        clock.uninstall()
+
+    def _cost(self):
+        spi = self.spi
+        return {
+            "transfers": spi.transfers,
+            "bytes": spi.bytes,
+            "est_ms": round((spi.busy_us + spi.transfers * self.transfer_us) / 1000, 3),
+        }
+
+    def _panel_rect(self, x, y, w, h):
+        get = self.panel.get_pixel
+        return b"".join(struct.pack(">H", get(x + col, y + row)) for row in range(h) for col in range(w))
+
+    def check(self, name, data, expected):
+        """
+        Decode and draw data; returns (draw costs, problems). expected is
+        the image as rgb565() gives it.
+        """
+        m = self.main
+        problems = []
+        names = m.EXPRESSION_NAMES
+        mode = 102 + names.index(name) if name in names else 102
+        costs = {}
+        for path in ("rows", "cached"):
+            e = self.assets.Expression(name, bytearray(data))
+            if path == "cached":
+                self.assets.decode(e)
+                if bytes(e.image) != expected:
+                    problems.append("decoded image differs")
+            self.spi.reset_counters()
+            m.draw_bitmap(e, mode)
+            costs[path] = self._cost()
+            x = (m.TOTAL_WIDTH - e.width) // 2
+            y = (m.TOTAL_HEIGHT - e.height) // 2
+            if self._panel_rect(x, y, e.width, e.height) != expected:
+                problems.append("panel differs when drawn " + ("from the cache" if path == "cached" else "row by row"))
+        return costs, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the mouth expression files.")
+    parser.add_argument("--source", default=os.path.join(MOUTH_DIR, "expressions.py"),
+                        help="expressions.py to convert and to check against")
+    parser.add_argument("--png", nargs="+", metavar="IMAGE", help="convert these PNG images instead")
+    parser.add_argument("--colors", type=int, default=MAX_COLORS,
+                        help="most palette colors per PNG image, 2..255 (default 16: 4 bits per pixel)")
+    parser.add_argument("--out", default=ASSET_DIR, help="output directory")
+    parser.add_argument("--export-png", metavar="DIR", help="write the expressions of --source as PNGs and stop")
+    parser.add_argument("--transfer-us", type=float, default=DEFAULT_TRANSFER_US,
+                        help="estimated fixed cost of one SPI transfer in microseconds")
+    args = parser.parse_args()
+    if not 2 <= args.colors <= 255:
+        parser.error("--colors must be 2..255")
+
+    reference = load_expressions(args.source) if os.path.exists(args.source) else {}
+    if args.export_png:
+        os.makedirs(args.export_png, exist_ok=True)
+        for name, (palette, bitmap) in sorted(reference.items()):
+            path = os.path.join(args.export_png, name + ".png")
+            write_png(path, palette, bitmap)
+            print("Wrote", path)
+        return
+
+    # name -> (palette, bitmap, source description, lossless)
+    sources = {}
+    if args.png:
+        for path in args.png:
+            name = os.path.splitext(os.path.basename(path))[0]
+            palette, bitmap, colors = from_png(path, args.colors)
+            sources[name] = (palette, bitmap, path, colors <= len(palette))
+    else:
+        for name, (palette, bitmap) in reference.items():
+            sources[name] = (palette, bitmap, os.path.basename(args.source), True)
+
+    checker = Checker(args.transfer_us)
+    files = {}      # name -> file contents, written once every one passed
+    manifest = {}
+    failed = False
+    try:
+        for name, (palette, bitmap, source, lossless) in sorted(sources.items()):
+            bits = 4 if len(palette) <= 16 else 8
+            packed = encode(palette, bitmap, PACKED)
+            rle = encode(palette, bitmap, RLE)
+            data = rle if len(rle) < len(packed) else packed
+            files[name] = data
+            costs, problems = checker.check(name, data, rgb565(palette, bitmap))
+            if name in reference and rgb565(palette, bitmap) != rgb565(*reference[name]):
+                problems.append("differs from " + os.path.basename(args.source))
+            manifest[name] = {
+                "source": source,
+                "lossless": lossless,
+                "width": len(bitmap[0]),
+                "height": len(bitmap),
+                "colors": len(palette),
+                "bits": bits,
+                "encoding": "RLE" if data is rle else "PACKED",
+                "bytes": len(data),
+                "packed_bytes": len(packed),
+                "rle_bytes": len(rle),
+                "decoded_bytes": 2 * len(bitmap[0]) * len(bitmap),
+                "draw": costs,
+            }
+            print("{:10} {:6} bytes {:6}  {:2} colors{}  rows {:5.1f} ms / {:3} transfers  cached {:5.1f} ms{}".format(
+                name, len(data), manifest[name]["encoding"], len(palette), "" if lossless else " (quantized)",
+                costs["rows"]["est_ms"], costs["rows"]["transfers"], costs["cached"]["est_ms"],
+                "  FAILED: " + ", ".join(problems) if problems else ""))
+            failed = failed or bool(problems)
+    finally:
+        checker.close()
+    if failed:
+        print("Build failed; nothing written to", args.out)
+        sys.exit(1)
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, data in sorted(files.items()):
+        with open(os.path.join(args.out, name + ".bin"), "wb") as f:
+            f.write(data)
+    report = {
+        "config": {"baudrate": checker.spi.baudrate, "transfer_us": args.transfer_us},
+        "total_bytes": sum(e["bytes"] for e in manifest.values()),
+        "expressions": manifest,
+    }
+    path = os.path.join(args.out, "manifest.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1, sort_keys=True)
+    print("{} expressions, {} bytes; wrote {}".format(len(manifest), report["total_bytes"], path))
+
+
+if __name__ == "__main__":
+    main()
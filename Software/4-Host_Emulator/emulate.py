@@ -0,0 +1,72 @@
+"""Run the Frontman firmware on the host.
+
+    python emulate.py eyes --seconds 10
+    python emulate.py both --seconds 30 --baud 62500000 --snapshot out/
+    python emulate.py eyes --set RENDER_FRAMEBUFFER=True --set eyesMode=106
+
+Both boards run their unmodified main.py on a virtual clock: time only
+advances when the firmware sleeps or sends bytes over SPI, so a 30 second
+run finishes as fast as the host can draw it and is the same every time for
+a given --seed. At the end the SPI traffic and the drawing calls of every
+panel are printed, and with --snapshot each panel is saved as a PNG image.
+
+--set changes a main.py setting after the firmware has been imported, so it
+only affects settings that are read while running (RENDER_FRAMEBUFFER,
+BROADCAST_WRITES, eyesMode, ...), not ones used at import time such as
+PROFILE or IRIS_CACHE_BUDGET.
+"""
+
+import argparse
+import ast
+import os
+
+from frontman_emu import Emulator
+
+
+def parse_setting(text):
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError("expected NAME=VALUE, got " + text)
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Frontman boards on virtual time.")
+    parser.add_argument("boards", choices=("eyes", "mouth", "both"))
+    parser.add_argument("--seconds", type=float, default=10.0, help="virtual seconds to run")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--baud", type=int, help="SPI baud rate (default: what tft_config asks for)")
+    parser.add_argument("--no-bus-time", action="store_true",
+                        help="count SPI time without letting it advance the clock")
+    parser.add_argument("--set", type=parse_setting, action="append", default=[],
+                        metavar="NAME=VALUE", help="change a main.py setting (BOARD.NAME with both)")
+    parser.add_argument("--snapshot", metavar="DIR", help="save every panel as a PNG image")
+    args = parser.parse_args()
+
+    names = ("eyes", "mouth") if args.boards == "both" else (args.boards,)
+    emu = Emulator(names, seed=args.seed, baudrate=args.baud,
+                   charge_bus_time=not args.no_bus_time)
+    for name, value in args.set:
+        board, _, setting = name.rpartition(".")
+        emu.board(board or names[0]).configure(**{setting: value})
+
+    try:
+        emu.run(args.seconds)
+    finally:
+        emu.report()
+        if args.snapshot:
+            os.makedirs(args.snapshot, exist_ok=True)
+            for b in emu.boards.values():
+                for i, panel in enumerate(b.panels()):
+                    path = os.path.join(args.snapshot, "{}{}.png".format(b.name, i + 1))
+                    panel.save_png(path)
+                    print("Saved", path)
+        emu.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Host emulator for the Frontman eyes and mouth boards.
+
+Runs the unmodified MicroPython firmware under CPython with stand-ins for
+the board-only modules (machine, rp2, gc9a01, framebuf, uasyncio, micropython,
+micropython_rotary_encoder) and a virtual clock.
+"""
+
+from frontman_emu.board import Board, BOARDS
+from frontman_emu.emulator import Emulator, synthetic_audio
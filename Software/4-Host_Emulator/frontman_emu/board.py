@@ -0,0 +1,117 @@
+"""Load a board's firmware directory into its own set of modules.
+
+Each board directory has its own main.py and tft_config.py, so the module
+names clash when both boards run in one process. Board.load() imports the
+firmware with the directory first on sys.path, then moves every module
+that came from that directory out of sys.modules and into Board.modules.
+The functions keep working afterwards because they reach their imports
+through their own module globals.
+
+Hardware the firmware creates, while loading or later from its tasks (see
+machine), is collected in Board.hardware. The coroutine the firmware passes
+to uasyncio.run() is kept in Board.entry instead of being run.
+"""
+
+import contextvars
+import gc
+import importlib
+import os
+import sys
+
+SOFTWARE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+MODULES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "modules")
+
+BOARDS = {
+    "eyes": os.path.join(SOFTWARE_DIR, "2-Pico2_Board_Driving_Eyes"),
+    "mouth": os.path.join(SOFTWARE_DIR, "3-Pico2_Board_Driving_Mouth"),
+}
+
+_loading = None   # Board whose firmware is being imported
+_current = contextvars.ContextVar("board", default=None)   # Board running the code
+
+
+def current():
+    return _current.get()
+
+
+def loading():
+    return _loading
+
+
+HEAP_SIZE = 480 * 1024   # Reported by gc.mem_free(); the host has no fixed heap
+
+
+def use_stand_ins():
+    # Put the stand-in MicroPython modules (machine, gc9a01, ...) on the path.
+    if MODULES_DIR not in sys.path:
+        sys.path.insert(0, MODULES_DIR)
+    # gc is built into CPython, so it cannot be replaced; add the heap queries.
+    if not hasattr(gc, "mem_free"):
+        gc.mem_free = lambda: HEAP_SIZE
+        gc.mem_alloc = lambda: 0
+
+
+class Board:
+    def __init__(self, name, path=None):
+        self.name = name
+        self.path = os.path.abspath(path or BOARDS[name])
+        self.modules = {}
+        self.hardware = {}
+        self.entry = None
+        self.main = None
+
+    def load(self, module="main"):
+        global _loading
+        from frontman_emu import clock
+        clock.install()
+        use_stand_ins()
+        own = [name for name, m in sys.modules.items() if self._owns(m)]
+        for name in own:
+            del sys.modules[name]
+        saved_path = list(sys.path)
+        sys.path.insert(0, self.path)
+        _loading = self
+        token = _current.set(self)
+        try:
+            self.main = importlib.import_module(module)
+        finally:
+            _current.reset(token)
+            _loading = None
+            sys.path[:] = saved_path
+            for name, m in list(sys.modules.items()):
+                if self._owns(m):
+                    self.modules[name] = sys.modules.pop(name)
+        return self.main
+
+    def _owns(self, module):
+        f = getattr(module, "__file__", None)
+        return f is not None and os.path.dirname(os.path.abspath(f)) == self.path
+
+    def context(self):
+        # Context for the board's tasks, so hardware they create lands here.
+        ctx = contextvars.copy_context()
+        ctx.run(_current.set, self)
+        return ctx
+
+    def module(self, name):
+        return self.modules[name]
+
+    def get(self, kind, index=0):
+        return self.hardware[kind][index]
+
+    def panels(self):
+        return [p for spi in self.hardware.get("spi", []) for p in spi.panels]
+
+    def pin(self, id):
+        # The last Pin created for a GPIO number.
+        for p in reversed(self.hardware.get("pins", [])):
+            if p.id == id:
+                return p
+        raise KeyError(id)
+
+    def configure(self, **settings):
+        # Change the USER CONFIGURABLE PARAMETERS of main.py after loading.
+        for name, value in settings.items():
+            if not hasattr(self.main, name):
+                raise AttributeError("{} main.py has no setting {}".format(self.name, name))
+            setattr(self.main, name, value)
@@ -0,0 +1,128 @@
+"""Virtual clock shared by the emulated boards.
+
+Time only moves when something waits: an asyncio sleep, time.sleep_ms() or
+a transfer on an emulated bus. A run therefore takes as much virtual time
+as it would on the board, independent of how fast the host is, and two runs
+with the same seed produce the same frames.
+"""
+
+import asyncio
+import selectors
+import time
+
+TICKS_PERIOD = 1 << 30   # MicroPython ticks wrap at 2**30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+
+class Clock:
+    def __init__(self):
+        self.us = 0
+
+    def reset(self):
+        self.us = 0
+
+    def advance_us(self, us):
+        if us > 0:
+            self.us += int(us)
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.us += max(1, round(seconds * 1000000))
+
+    def seconds(self):
+        return self.us / 1000000
+
+
+CLOCK = Clock()
+
+
+# ----- MicroPython time functions -----
+def ticks_us():
+    return CLOCK.us & TICKS_MAX
+
+def ticks_ms():
+    return (CLOCK.us // 1000) & TICKS_MAX
+
+def ticks_cpu():
+    return ticks_us()
+
+def ticks_add(ticks, delta):
+    return (ticks + delta) & TICKS_MAX
+
+def ticks_diff(end, start):
+    return ((end - start + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+def sleep(seconds):
+    CLOCK.advance(seconds)
+
+def sleep_ms(ms):
+    CLOCK.advance_us(ms * 1000)
+
+def sleep_us(us):
+    CLOCK.advance_us(us)
+
+
+_PATCHED = ("ticks_us", "ticks_ms", "ticks_cpu", "ticks_add", "ticks_diff",
+            "sleep", "sleep_ms", "sleep_us")
+_saved = {}
+
+
+def install():
+    # Give the host time module the MicroPython ticks and sleep functions.
+    if _saved:
+        return
+    for name in _PATCHED:
+        _saved[name] = getattr(time, name, None)
+        setattr(time, name, globals()[name])
+
+
+def uninstall():
+    for name, fn in _saved.items():
+        if fn is None:
+            delattr(time, name)
+        else:
+            setattr(time, name, fn)
+    _saved.clear()
+
+
+# ----- asyncio on virtual time -----
+class _VirtualSelector(selectors.BaseSelector):
+    # Polls the real selector without blocking; a wait becomes a clock jump.
+    def __init__(self, clock):
+        self._clock = clock
+        self._real = selectors.DefaultSelector()
+
+    def register(self, fileobj, events, data=None):
+        return self._real.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._real.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._real.modify(fileobj, events, data)
+
+    def get_map(self):
+        return self._real.get_map()
+
+    def close(self):
+        self._real.close()
+
+    def select(self, timeout=None):
+        ready = self._real.select(0)
+        if ready:
+            return ready
+        if timeout is None:
+            raise RuntimeError("emulated boards are idle with nothing scheduled")
+        self._clock.advance(timeout)
+        return []
+
+
+class VirtualLoop(asyncio.SelectorEventLoop):
+    def __init__(self, clock=CLOCK):
+        super().__init__(_VirtualSelector(clock))
+        self._clock = clock
+        self._clock_resolution = 1e-6
+
+    def time(self):
+        return self._clock.us / 1000000
@@ -0,0 +1,113 @@
+"""Run one or both Frontman boards on the host, on virtual time."""
+
+import asyncio
+import math
+import random
+
+from frontman_emu import clock
+from frontman_emu.board import Board, use_stand_ins
+
+
+def synthetic_audio(t, band):
+    # MSGEQ7 band level (0..65535) at time t: a 2 Hz beat in the low bands
+    # and a slow sweep through the others.
+    beat = max(0.0, math.cos(2 * math.pi * 2 * t)) ** 4
+    sweep = 0.5 + 0.5 * math.sin(2 * math.pi * (0.25 * t - band / 7))
+    level = (1 - band / 7) * beat * 0.7 + sweep * 0.4
+    return int(min(1.0, level) * 65535)
+
+
+class Emulator:
+    """
+    emu = Emulator(["eyes", "mouth"], seed=1)
+    emu.at(2.0, lambda: emu.board("eyes").get("encoder").turn(2))
+    emu.run(10)
+    emu.report()
+
+    Boards start on the first run() and keep their state across calls, so
+    run() can be called repeatedly to step through time. When both boards
+    are loaded, the eyes UART is wired to the mouth UART.
+    """
+
+    def __init__(self, boards=("eyes",), seed=0, baudrate=None, charge_bus_time=True,
+                 audio=synthetic_audio):
+        use_stand_ins()
+        import machine
+        clock.CLOCK.reset()
+        machine.SPI.baudrate_override = baudrate
+        machine.SPI.charge_time = charge_bus_time
+        self.audio = audio
+        self._adc_reads = 0
+        machine.ADC.default_source = self._read_audio
+        random.seed(seed)
+        self.boards = {}
+        for name in boards:
+            b = Board(name)
+            b.load()
+            self.boards[name] = b
+        if "eyes" in self.boards and "mouth" in self.boards:
+            self.boards["eyes"].get("uart").connect(self.boards["mouth"].get("uart"))
+        self.loop = clock.VirtualLoop()
+        self._tasks = []
+        self._error = None
+
+    def _read_audio(self, adc):
+        # The mouth strobes through the seven bands in order.
+        band = self._adc_reads % 7
+        self._adc_reads += 1
+        return self.audio(self.now(), band)
+
+    def board(self, name):
+        return self.boards[name]
+
+    def now(self):
+        return clock.CLOCK.seconds()
+
+    def at(self, seconds, fn, *args):
+        # Call fn(*args) at the given virtual time (seconds since start).
+        return self.loop.call_at(seconds, fn, *args)
+
+    def _start(self):
+        for b in self.boards.values():
+            if b.entry is None:
+                raise RuntimeError("{} main.py did not call uasyncio.run()".format(b.name))
+            task = self.loop.create_task(b.entry, context=b.context())
+            task.add_done_callback(self._finished)
+            self._tasks.append(task)
+
+    def _finished(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self._error = task.exception()
+            self.loop.stop()
+
+    def run(self, seconds):
+        # Advance the boards by the given number of virtual seconds.
+        if not self._tasks:
+            self._start()
+        self.loop.call_at(self.now() + seconds, self.loop.stop)
+        self.loop.run_forever()
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+        self.loop.close()
+        clock.uninstall()
+
+    def report(self):
+        print("Virtual time {:.3f} s".format(self.now()))
+        for b in self.boards.values():
+            print("{}:".format(b.name))
+            for spi in b.hardware.get("spi", []):
+                print("  SPI{} {:.1f} MHz: {} bytes in {} transfers, busy {:.1f} ms ({:.1f}%)".format(
+                    spi.id, (spi.baudrate_override or spi.baudrate) / 1e6, spi.bytes, spi.transfers,
+                    spi.busy_us / 1000, spi.busy_us / 10000 / max(self.now(), 1e-9)))
+            for i, panel in enumerate(b.panels()):
+                calls = ", ".join("{} {}".format(k, v) for k, v in sorted(panel.calls.items()))
+                print("  panel {}: {} pixels ({})".format(i + 1, panel.pixels, calls or "no calls"))
+            for uart in b.hardware.get("uart", []):
+                print("  UART{}: {} bytes sent".format(uart.id, len(uart.sent)))
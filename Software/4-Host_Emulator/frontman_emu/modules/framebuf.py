@@ -0,0 +1,187 @@
+"""Stand-in for the MicroPython framebuf module.
+
+Same pixel formats and buffer layouts as the firmware, so buffers built on
+the host can be sent to the emulated panels unchanged. RGB565 pixels are
+stored little-endian, as on the RP2350.
+"""
+
+MONO_VLSB = 0
+MVLSB = MONO_VLSB
+RGB565 = 1
+GS4_HMSB = 2
+MONO_HLSB = 3
+MONO_HMSB = 4
+GS2_HMSB = 5
+GS8 = 6
+
+
+class FrameBuffer:
+    def __init__(self, buffer, width, height, format, stride=None):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.format = format
+        stride = width if stride is None else stride
+        if format not in (MONO_VLSB, RGB565, GS4_HMSB, MONO_HLSB, MONO_HMSB, GS2_HMSB, GS8):
+            raise ValueError("invalid format")
+        # Packed formats round the stride up to whole bytes, like modframebuf.c.
+        if format in (MONO_HLSB, MONO_HMSB):
+            stride = (stride + 7) & ~7
+        elif format == GS2_HMSB:
+            stride = (stride + 3) & ~3
+        elif format == GS4_HMSB:
+            stride = (stride + 1) & ~1
+        self.stride = stride
+
+    # ----- per-format pixel access -----
+    def _get(self, x, y):
+        buf = self.buffer
+        fmt = self.format
+        if fmt == RGB565:
+            o = (y * self.stride + x) * 2
+            return buf[o] | buf[o + 1] << 8
+        if fmt == GS8:
+            return buf[y * self.stride + x]
+        if fmt == MONO_VLSB:
+            return buf[(y >> 3) * self.stride + x] >> (y & 7) & 1
+        if fmt == MONO_HLSB:
+            return buf[(y * self.stride + x) >> 3] >> (7 - (x & 7)) & 1
+        if fmt == MONO_HMSB:
+            return buf[(y * self.stride + x) >> 3] >> (x & 7) & 1
+        if fmt == GS4_HMSB:
+            b = buf[(y * self.stride + x) >> 1]
+            return b & 0x0F if x & 1 else b >> 4
+        o = y * self.stride + x   # GS2_HMSB
+        return buf[o >> 2] >> ((o & 3) << 1) & 3
+
+    def _set(self, x, y, c):
+        buf = self.buffer
+        fmt = self.format
+        if fmt == RGB565:
+            o = (y * self.stride + x) * 2
+            buf[o] = c & 0xFF
+            buf[o + 1] = c >> 8 & 0xFF
+        elif fmt == GS8:
+            buf[y * self.stride + x] = c & 0xFF
+        elif fmt == MONO_VLSB:
+            o = (y >> 3) * self.stride + x
+            bit = 1 << (y & 7)
+            buf[o] = buf[o] | bit if c else buf[o] & ~bit
+        elif fmt == MONO_HLSB:
+            o = (y * self.stride + x) >> 3
+            bit = 0x80 >> (x & 7)
+            buf[o] = buf[o] | bit if c else buf[o] & ~bit
+        elif fmt == MONO_HMSB:
+            o = (y * self.stride + x) >> 3
+            bit = 1 << (x & 7)
+            buf[o] = buf[o] | bit if c else buf[o] & ~bit
+        elif fmt == GS4_HMSB:
+            o = (y * self.stride + x) >> 1
+            if x & 1:
+                buf[o] = buf[o] & 0xF0 | c & 0x0F
+            else:
+                buf[o] = buf[o] & 0x0F | (c & 0x0F) << 4
+        else:
+            o = y * self.stride + x
+            shift = (o & 3) << 1
+            buf[o >> 2] = buf[o >> 2] & ~(3 << shift) | (c & 3) << shift
+
+    # ----- drawing -----
+    def fill_rect(self, x, y, w, h, c):
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        w = min(w, self.width - x)
+        h = min(h, self.height - y)
+        if w <= 0 or h <= 0:
+            return
+        if self.format == RGB565:
+            row = bytes((c & 0xFF, c >> 8 & 0xFF)) * w
+            stride = self.stride * 2
+            o = (y * self.stride + x) * 2
+            for _ in range(h):
+                self.buffer[o:o + 2 * w] = row
+                o += stride
+            return
+        for py in range(y, y + h):
+            for px in range(x, x + w):
+                self._set(px, py, c)
+
+    def fill(self, c):
+        self.fill_rect(0, 0, self.width, self.height, c)
+
+    def hline(self, x, y, w, c):
+        self.fill_rect(x, y, w, 1, c)
+
+    def vline(self, x, y, h, c):
+        self.fill_rect(x, y, 1, h, c)
+
+    def rect(self, x, y, w, h, c, f=False):
+        if f:
+            self.fill_rect(x, y, w, h, c)
+            return
+        self.fill_rect(x, y, w, 1, c)
+        self.fill_rect(x, y + h - 1, w, 1, c)
+        self.fill_rect(x, y, 1, h, c)
+        self.fill_rect(x + w - 1, y, 1, h, c)
+
+    def pixel(self, x, y, c=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+        if c is None:
+            return self._get(x, y)
+        self._set(x, y, c)
+
+    def line(self, x0, y0, x1, y1, c):
+        dx = abs(x1 - x0)
+        dy = -abs(y1 - y0)
+        sx = 1 if x0 < x1 else -1
+        sy = 1 if y0 < y1 else -1
+        err = dx + dy
+        while True:
+            self.pixel(x0, y0, c)
+            if x0 == x1 and y0 == y1:
+                return
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x0 += sx
+            if e2 <= dx:
+                err += dx
+                y0 += sy
+
+    def scroll(self, xstep, ystep):
+        copy = FrameBuffer(bytearray(self.buffer), self.width, self.height, self.format, self.stride)
+        self.blit(copy, xstep, ystep)
+
+    def blit(self, source, x, y, key=-1, palette=None):
+        if isinstance(source, tuple):
+            source = FrameBuffer(*source)
+        x0 = max(0, x)
+        y0 = max(0, y)
+        x1 = min(self.width, x + source.width)
+        y1 = min(self.height, y + source.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        if (self.format == RGB565 and source.format == RGB565
+                and key == -1 and palette is None):
+            n = (x1 - x0) * 2
+            for py in range(y0, y1):
+                s = ((py - y) * source.stride + x0 - x) * 2
+                o = (py * self.stride + x0) * 2
+                self.buffer[o:o + n] = source.buffer[s:s + n]
+            return
+        get = source._get
+        lookup = palette._get if palette is not None else None
+        put = self._set
+        for py in range(y0, y1):
+            sy = py - y
+            for px in range(x0, x1):
+                c = get(px - x, sy)
+                if lookup is not None:
+                    c = lookup(c, 0)
+                if c != key:
+                    put(px, py, c)
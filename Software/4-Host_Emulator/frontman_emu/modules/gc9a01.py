@@ -0,0 +1,221 @@
+"""Stand-in for the gc9a01 display driver, backed by a host framebuffer.
+
+GC9A01 keeps the panel memory in fb as big-endian RGB565, exactly as the
+panel receives it. The drawing calls (fill, fill_rect, hline, vline, pixel,
+fill_circle, blit_buffer) are counted per name, together with the pixels
+they write, and charged to the SPI bus like the C driver would send them:
+an 11 byte address window followed by the pixel data.
+
+Raw bus traffic is decoded too: while the panel's CS pin is low, bytes
+written to the SPI object are interpreted as CASET / RASET / RAMWR
+commands and data, which is how BroadcastDisplay and the DMA pipeline talk
+to the panels.
+"""
+
+WINDOW_BYTES = 11   # CASET + 4, RASET + 4, RAMWR
+
+_CASET = 0x2A
+_RASET = 0x2B
+_RAMWR = 0x2C
+
+
+def color565(red, green=0, blue=0):
+    if isinstance(red, (tuple, list)):
+        red, green, blue = red[:3]
+    return (red & 0xF8) << 8 | (green & 0xFC) << 3 | blue >> 3
+
+
+BLACK = 0x0000
+BLUE = 0x001F
+RED = 0xF800
+GREEN = 0x07E0
+CYAN = 0x07FF
+MAGENTA = 0xF81F
+YELLOW = 0xFFE0
+WHITE = 0xFFFF
+
+
+class GC9A01:
+    def __init__(self, spi, width, height, reset=None, cs=None, dc=None, backlight=None,
+                 rotation=0, options=0, buffer_size=0):
+        self.spi = spi
+        self._width = width
+        self._height = height
+        self.cs = cs
+        self.dc = dc
+        self.rotation = rotation
+        self.fb = bytearray(width * height * 2)
+        self.calls = {}
+        self.pixels = 0
+        self._command = None
+        self._args = bytearray()
+        self._window = [0, 0, width - 1, height - 1]
+        self._cursor = 0
+        spi.panels.append(self)
+
+    # ----- driver API -----
+    def init(self):
+        pass
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+    def fill(self, color):
+        self._count("fill")
+        self._fill_rect(0, 0, self._width, self._height, color)
+
+    def fill_rect(self, x, y, w, h, color):
+        self._count("fill_rect")
+        self._fill_rect(x, y, w, h, color)
+
+    def hline(self, x, y, w, color):
+        self._count("hline")
+        self._fill_rect(x, y, w, 1, color)
+
+    def vline(self, x, y, h, color):
+        self._count("vline")
+        self._fill_rect(x, y, 1, h, color)
+
+    def pixel(self, x, y, color):
+        self._count("pixel")
+        self._fill_rect(x, y, 1, 1, color)
+
+    def fill_circle(self, x0, y0, r, color):
+        # Same midpoint algorithm as the C driver, one vertical line at a time.
+        self._count("fill_circle")
+        line = self._fill_rect
+        f = 1 - r
+        ddf_x = 1
+        ddf_y = -2 * r
+        x = 0
+        y = r
+        line(x0, y0 - r, 1, 2 * r + 1, color)
+        while x < y:
+            if f >= 0:
+                y -= 1
+                ddf_y += 2
+                f += ddf_y
+            x += 1
+            ddf_x += 2
+            f += ddf_x
+            line(x0 + x, y0 - y, 1, 2 * y + 1, color)
+            line(x0 + y, y0 - x, 1, 2 * x + 1, color)
+            line(x0 - x, y0 - y, 1, 2 * y + 1, color)
+            line(x0 - y, y0 - x, 1, 2 * x + 1, color)
+
+    def blit_buffer(self, buffer, x, y, w, h):
+        self._count("blit_buffer")
+        if len(buffer) < w * h * 2:
+            raise ValueError("buffer too small")
+        self.spi.transfer(WINDOW_BYTES + w * h * 2)
+        self.pixels += w * h
+        self._put(memoryview(buffer), x, y, w, h)
+
+    # ----- inspection -----
+    def get_pixel(self, x, y):
+        o = (y * self._width + x) * 2
+        return self.fb[o] << 8 | self.fb[o + 1]
+
+    def rgb888(self):
+        # Panel contents as packed 8-bit RGB rows.
+        fb = self.fb
+        out = bytearray(self._width * self._height * 3)
+        j = 0
+        for i in range(0, len(fb), 2):
+            c = fb[i] << 8 | fb[i + 1]
+            r = c >> 11
+            g = c >> 5 & 0x3F
+            b = c & 0x1F
+            out[j] = r << 3 | r >> 2
+            out[j + 1] = g << 2 | g >> 4
+            out[j + 2] = b << 3 | b >> 2
+            j += 3
+        return out
+
+    def save_png(self, path):
+        from frontman_emu import png
+        png.write(path, self._width, self._height, self.rgb888())
+
+    def reset_counters(self):
+        self.calls = {}
+        self.pixels = 0
+
+    # ----- internals -----
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def _fill_rect(self, x, y, w, h, color):
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        w = min(w, self._width - x)
+        h = min(h, self._height - y)
+        if w <= 0 or h <= 0:
+            return
+        self.spi.transfer(WINDOW_BYTES + w * h * 2)
+        self.pixels += w * h
+        row = bytes((color >> 8 & 0xFF, color & 0xFF)) * w
+        stride = self._width * 2
+        o = y * stride + x * 2
+        for _ in range(h):
+            self.fb[o:o + 2 * w] = row
+            o += stride
+
+    def _put(self, data, x, y, w, h):
+        # Copy w x h big-endian pixels from data, clipped to the panel.
+        x0 = max(0, x)
+        x1 = min(self._width, x + w)
+        if x0 >= x1:
+            return
+        n = (x1 - x0) * 2
+        stride = self._width * 2
+        for row in range(h):
+            py = y + row
+            if 0 <= py < self._height:
+                s = (row * w + x0 - x) * 2
+                o = py * stride + x0 * 2
+                self.fb[o:o + n] = data[s:s + n]
+
+    def bus_write(self, data, dc):
+        # Bytes sent while CS is low: commands with DC low, data with DC high.
+        if not dc:
+            for b in bytes(data):
+                self._command = b
+                self._args = bytearray()
+                if b == _RAMWR:
+                    self._cursor = 0
+            return
+        if self._command in (_CASET, _RASET):
+            self._args += data
+            if len(self._args) >= 4:
+                a = self._args
+                start = a[0] << 8 | a[1]
+                end = a[2] << 8 | a[3]
+                if self._command == _CASET:
+                    self._window[0] = start
+                    self._window[2] = end
+                else:
+                    self._window[1] = start
+                    self._window[3] = end
+        elif self._command == _RAMWR:
+            self._ram_write(bytes(data))
+
+    def _ram_write(self, data):
+        x0, y0, x1, y1 = self._window
+        w = x1 - x0 + 1
+        n = self._cursor
+        i = 0
+        end = len(data) - 1
+        while i < end:
+            col = n % w
+            k = min(w - col, (len(data) - i) // 2)
+            self._put(data[i:i + 2 * k], x0 + col, y0 + n // w, k, 1)
+            n += k
+            i += 2 * k
+        self._cursor = n
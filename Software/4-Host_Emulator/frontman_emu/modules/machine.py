@@ -0,0 +1,291 @@
+"""Stand-in for the MicroPython machine module.
+
+Every Pin, SPI, UART, PWM and ADC created while a board is loading is
+registered on that board, so tests and tools can reach the hardware the
+firmware created (e.g. drive the encoder pins, read the UART output).
+"""
+
+from frontman_emu.clock import CLOCK
+from frontman_emu import board as _board
+
+
+def freq():
+    return 150000000
+
+
+def idle():
+    # On the board: wait for an event or interrupt. The host has nothing to
+    # wait for, and idling must not move the virtual clock.
+    pass
+
+
+def _register(kind, obj):
+    b = _board.current()
+    if b is not None:
+        b.hardware.setdefault(kind, []).append(obj)
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    ALT = 3
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode=-1, pull=-1, value=None):
+        self.id = id
+        self.mode = mode
+        self.pull = pull
+        self._value = 1 if pull == Pin.PULL_UP else 0
+        if value is not None:
+            self._value = 1 if value else 0
+        self._handler = None
+        self._trigger = 0
+        _register("pins", self)
+
+    def init(self, mode=-1, pull=-1, value=None):
+        if mode != -1:
+            self.mode = mode
+        if pull != -1:
+            self.pull = pull
+        if value is not None:
+            self._value = 1 if value else 0
+
+    def value(self, v=None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    __call__ = value
+
+    def on(self):
+        self._value = 1
+
+    def off(self):
+        self._value = 0
+
+    def toggle(self):
+        self._value ^= 1
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING, hard=False):
+        self._handler = handler
+        self._trigger = trigger
+
+    def drive(self, v):
+        # Change the level from outside (a button, the encoder) and fire the IRQ.
+        v = 1 if v else 0
+        if v == self._value:
+            return
+        self._value = v
+        edge = Pin.IRQ_RISING if v else Pin.IRQ_FALLING
+        if self._handler is not None and self._trigger & edge:
+            self._handler(self)
+
+    def __repr__(self):
+        return "Pin({})".format(self.id)
+
+
+class SPI:
+    """
+    Counts the bytes and transfers on the bus and advances the virtual clock
+    by the time they take at the bus baud rate. Bytes written while a
+    panel's CS pin is low are decoded by that panel (see gc9a01.GC9A01).
+    """
+
+    baudrate_override = None   # Set by the emulator to force a bus speed
+    charge_time = True         # False: count bus time without advancing the clock
+
+    def __init__(self, id, baudrate=1000000, polarity=0, phase=0, bits=8,
+                 firstbit=0, sck=None, mosi=None, miso=None):
+        self.id = id
+        self.baudrate = baudrate
+        self.bytes = 0
+        self.transfers = 0
+        self.busy_us = 0
+        self.panels = []
+        self._elapsed_us = 0.0   # Bus time ever, fractions included
+        self._charged_us = 0     # Part of it already added to the clock
+        _register("spi", self)
+
+    def init(self, baudrate=None, **kw):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def transfer(self, nbytes, charge=True):
+        # Account for one transfer of nbytes on the bus and return its time in
+        # us. charge=False: the CPU does not wait for it (DMA, see rp2).
+        baud = SPI.baudrate_override or self.baudrate
+        us = nbytes * 8 * 1000000 / baud
+        self.bytes += nbytes
+        self.transfers += 1
+        self.busy_us += us
+        if not charge:
+            return us
+        self._elapsed_us += us
+        due = int(self._elapsed_us) - self._charged_us
+        self._charged_us += due
+        if SPI.charge_time:
+            CLOCK.advance_us(due)
+        return us
+
+    def write(self, buf):
+        self.transfer(len(buf))
+        self.deliver(buf)
+
+    def deliver(self, buf):
+        # Hand bytes on the bus to the panels whose CS pin is low.
+        for panel in self.panels:
+            if panel.cs is not None and panel.cs.value() == 0:
+                panel.bus_write(buf, panel.dc.value() if panel.dc is not None else 1)
+
+    def read(self, nbytes, write=0x00):
+        self.transfer(nbytes)
+        return bytes(nbytes)
+
+    def readinto(self, buf, write=0x00):
+        self.transfer(len(buf))
+        for i in range(len(buf)):
+            buf[i] = 0
+
+    def write_readinto(self, write_buf, read_buf):
+        self.write(write_buf)
+        for i in range(len(read_buf)):
+            read_buf[i] = 0
+
+    def reset_counters(self):
+        self.bytes = 0
+        self.transfers = 0
+        self.busy_us = 0
+
+
+class UART:
+    """
+    Bytes written go to the connected peer UART (see connect()) and are
+    also kept in sent for inspection. Received bytes wait in rx.
+    """
+
+    def __init__(self, id, baudrate=9600, bits=8, parity=None, stop=1, tx=None, rx=None, **kw):
+        self.id = id
+        self.baudrate = baudrate
+        self.sent = bytearray()
+        self.rx = bytearray()
+        self.peer = None
+        self.on_rx = None
+        _register("uart", self)
+
+    def init(self, baudrate=None, **kw):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def connect(self, peer):
+        self.peer = peer
+
+    def feed(self, data):
+        if isinstance(data, str):
+            data = data.encode()
+        self.rx += data
+        if self.on_rx is not None:
+            self.on_rx()
+
+    def write(self, buf):
+        if isinstance(buf, str):
+            buf = buf.encode()
+        self.sent += buf
+        if self.peer is not None:
+            self.peer.feed(buf)
+        return len(buf)
+
+    def any(self):
+        return len(self.rx)
+
+    def read(self, nbytes=None):
+        if not self.rx:
+            return None
+        if nbytes is None or nbytes > len(self.rx):
+            nbytes = len(self.rx)
+        data = bytes(self.rx[:nbytes])
+        del self.rx[:nbytes]
+        return data
+
+    def readinto(self, buf, nbytes=None):
+        data = self.read(len(buf) if nbytes is None else nbytes)
+        if data is None:
+            return None
+        buf[:len(data)] = data
+        return len(data)
+
+    def readline(self):
+        if not self.rx:
+            return None
+        end = self.rx.find(b"\n")
+        return self.read(len(self.rx) if end < 0 else end + 1)
+
+    def flush(self):
+        pass
+
+    def txdone(self):
+        return True
+
+
+class PWM:
+    def __init__(self, pin, freq=0, duty_u16=0):
+        self.pin = pin
+        self._freq = freq
+        self._duty = duty_u16
+        self.changes = 0
+        _register("pwm", self)
+
+    def freq(self, f=None):
+        if f is None:
+            return self._freq
+        self._freq = f
+
+    def duty_u16(self, d=None):
+        if d is None:
+            return self._duty
+        self._duty = d
+        self.changes += 1
+
+    def deinit(self):
+        self._duty = 0
+
+
+class ADC:
+    """
+    read_u16() returns source(adc): the instance's source if set, otherwise
+    ADC.default_source. Without either it reads 0.
+    """
+
+    default_source = None
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.source = None
+        _register("adc", self)
+
+    def read_u16(self):
+        source = self.source or ADC.default_source
+        return 0 if source is None else source(self) & 0xFFFF
+
+
+class _Memory:
+    def __init__(self, mask):
+        self._mask = mask
+        self._cells = {}
+
+    def __getitem__(self, address):
+        return self._cells.get(address, 0)
+
+    def __setitem__(self, address, value):
+        self._cells[address] = value & self._mask
+
+
+mem8 = _Memory(0xFF)
+mem16 = _Memory(0xFFFF)
+mem32 = _Memory(0xFFFFFFFF)
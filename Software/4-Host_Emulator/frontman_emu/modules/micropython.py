@@ -0,0 +1,52 @@
+"""Stand-in for the micropython module."""
+
+import asyncio
+
+
+def const(value):
+    return value
+
+
+def native(fn):
+    return fn
+
+
+viper = native
+
+
+def alloc_emergency_exception_buf(size):
+    pass
+
+
+def schedule(fn, arg):
+    # Runs soon on the event loop thread, like a soft IRQ callback.
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        fn(arg)
+        return
+    loop.call_soon_threadsafe(fn, arg)
+
+
+def heap_lock():
+    return 0
+
+
+def heap_unlock():
+    return 0
+
+
+def kbd_intr(chr):
+    pass
+
+
+def opt_level(level=None):
+    return 0
+
+
+def mem_info(verbose=False):
+    print("mem: emulated")
+
+
+def stack_use():
+    return 0
@@ -0,0 +1,38 @@
+"""Stand-in for micropython_rotary_encoder.
+
+The encoder is turned from the host with turn(event), which calls the
+handlers registered with on() exactly as the library does after decoding
+the pins.
+"""
+
+import asyncio
+from frontman_emu import board as _board
+
+
+class RotaryEncoderEvent:
+    TURN_LEFT = 1
+    TURN_RIGHT = 2
+    TURN_LEFT_FAST = 3
+    TURN_RIGHT_FAST = 4
+
+
+class RotaryEncoderRP2:
+    def __init__(self, pin_clk, pin_dt, **kw):
+        self.pin_clk = pin_clk
+        self.pin_dt = pin_dt
+        self.handlers = {}
+        b = _board.current()
+        if b is not None:
+            b.hardware.setdefault("encoder", []).append(self)
+
+    def on(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def turn(self, event, clicks=1):
+        for _ in range(clicks):
+            for handler in self.handlers.get(event, ()):
+                handler()
+
+    async def async_tick(self):
+        while True:
+            await asyncio.sleep(0.01)
@@ -0,0 +1,102 @@
+"""Stand-in for the rp2 module: DMA into the SPI transmit FIFO.
+
+A transfer started with DMA.config(..., trigger=True) whose write address is
+an SPI data register goes to that emulated SPI bus at once, so the panels
+see the bytes, but the CPU is not charged for it: active() stays True until
+the virtual clock has passed the bus time, and the irq handler runs on the
+event loop at that moment. When bus time is not charged (SPI.charge_time
+False) a transfer is done as soon as it starts.
+
+Other DMA uses (memory to memory, PIO) are not emulated.
+"""
+
+import asyncio
+from frontman_emu.clock import CLOCK
+from frontman_emu import board as _board
+import machine
+
+SPI_BASES = {0x40080000: 0, 0x40088000: 1}   # RP2350 SPI0, SPI1
+SSPDR = 0x008
+POLL_US = 10   # Virtual time one active() poll takes while busy
+
+
+def _spi(b, address):
+    id = SPI_BASES.get(address - SSPDR)
+    if id is None or b is None:
+        raise ValueError("DMA write address {:#x} is not an emulated SPI".format(address))
+    for spi in reversed(b.hardware.get("spi", [])):
+        if spi.id == id:
+            return spi
+    raise ValueError("no SPI({}) on this board".format(id))
+
+
+class DMA:
+    def __init__(self):
+        self._board = _board.current()   # Whose SPI buses the transfers use
+        self.read = None
+        self.write = None
+        self.count = 0
+        self.ctrl = 0
+        self._end_us = 0
+        self._handler = None
+        self._pending = None
+
+    def pack_ctrl(self, default=None, **kw):
+        # The fields are not used; any int will do.
+        return 0 if default is None else default
+
+    def unpack_ctrl(self, value):
+        return {}
+
+    def config(self, read=None, write=None, count=None, ctrl=None, trigger=False):
+        if read is not None:
+            self.read = read
+        if write is not None:
+            self.write = write
+        if count is not None:
+            self.count = count
+        if ctrl is not None:
+            self.ctrl = ctrl
+        if trigger:
+            self.active(1)
+
+    def active(self, value=None):
+        if value is None:
+            if CLOCK.us < self._end_us:
+                CLOCK.advance_us(min(POLL_US, self._end_us - CLOCK.us))
+                return True
+            return False
+        if value:
+            self._start()
+
+    def _start(self):
+        spi = _spi(self._board or _board.current(), self.write)
+        data = memoryview(self.read)[:self.count]
+        us = spi.transfer(self.count, charge=False)
+        spi.deliver(data)
+        if not machine.SPI.charge_time:
+            us = 0
+        self._end_us = CLOCK.us + int(us)
+        if self._handler is None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._handler(self)
+            return
+        if self._pending is not None:
+            self._pending.cancel()
+        self._pending = loop.call_at(self._end_us / 1000000, self._irq)
+
+    def _irq(self):
+        self._pending = None
+        self._handler(self)
+
+    def irq(self, handler=None, hard=False):
+        self._handler = handler
+
+    def close(self):
+        if self._pending is not None:
+            self._pending.cancel()
+            self._pending = None
+        self._handler = None
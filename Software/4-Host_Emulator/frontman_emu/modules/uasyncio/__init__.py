@@ -0,0 +1,118 @@
+"""Stand-in for uasyncio on top of the host asyncio, run on virtual time.
+
+While a board is loading, run() only records the board's entry coroutine so
+the emulator can start all boards together. Called at any other time it
+runs the coroutine to completion on a VirtualLoop.
+"""
+
+import asyncio
+from asyncio import *   # noqa: F401,F403
+from frontman_emu import board as _board
+from frontman_emu.clock import VirtualLoop
+
+
+async def sleep_ms(ms):
+    await asyncio.sleep(ms / 1000)
+
+
+async def wait_for_ms(aw, timeout):
+    return await asyncio.wait_for(aw, timeout / 1000)
+
+
+def run(coro):
+    b = _board.loading()
+    if b is not None:
+        b.entry = coro
+        return None
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pass
+    else:
+        raise RuntimeError("uasyncio.run() called from a running event loop")
+    loop = VirtualLoop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class ThreadSafeFlag:
+    # Not tied to one event loop, and set() may come from another thread.
+    def __init__(self):
+        self._flag = False
+        self._waiter = None
+
+    def set(self):
+        self._flag = True
+        waiter = self._waiter
+        if waiter is not None:
+            waiter.get_loop().call_soon_threadsafe(self._wake, waiter)
+
+    @staticmethod
+    def _wake(waiter):
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def clear(self):
+        self._flag = False
+
+    async def wait(self):
+        if not self._flag:
+            self._waiter = asyncio.get_running_loop().create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        self._flag = False
+
+
+class StreamReader:
+    # MicroPython style reader over a file object such as sys.stdin, or over
+    # a machine.UART stand-in.
+    def __init__(self, stream, *args):
+        self.s = stream
+        self._eof = False
+
+    async def _forever(self):
+        await asyncio.get_running_loop().create_future()
+
+    async def readline(self):
+        try:
+            fd = self.s.fileno()
+        except (AttributeError, OSError, ValueError):
+            fd = None
+        if fd is None or self._eof:
+            await self._forever()
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        try:
+            loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        except OSError:   # Not pollable, e.g. redirected from a file
+            self._eof = True
+            await self._forever()
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+        line = self.s.readline()
+        if not line:
+            self._eof = True
+            await self._forever()
+        return line
+
+    async def _uart_ready(self):
+        uart = self.s
+        while not uart.any():
+            waiter = asyncio.get_running_loop().create_future()
+            uart.on_rx = lambda: ThreadSafeFlag._wake(waiter)
+            try:
+                await waiter
+            finally:
+                uart.on_rx = None
+
+    async def read(self, n=-1):
+        if hasattr(self.s, "any"):
+            await self._uart_ready()
+            return self.s.read(n if n > 0 else None)
+        return await self.readline()
@@ -0,0 +1,102 @@
+"""Minimal PNG reading and writing for 8-bit RGB images (zlib only)."""
+
+import struct
+import zlib
+
+_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def write(path, width, height, rgb):
+    # rgb holds width * height packed R, G, B bytes, row by row.
+    stride = width * 3
+    raw = bytearray()
+    for y in range(height):
+        raw.append(0)   # Filter: none
+        raw += rgb[y * stride:(y + 1) * stride]
+    with open(path, "wb") as f:
+        f.write(_SIGNATURE)
+        f.write(_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(_chunk(b"IDAT", zlib.compress(bytes(raw), 9)))
+        f.write(_chunk(b"IEND", b""))
+
+
+def read(path):
+    # Returns (width, height, rgb) for 8-bit RGB or RGBA, non-interlaced.
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:8] != _SIGNATURE:
+        raise ValueError(path + ": not a PNG file")
+    pos = 8
+    idat = bytearray()
+    width = height = channels = None
+    while pos < len(data):
+        length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if kind == b"IHDR":
+            width, height, depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+            if depth != 8 or color_type not in (2, 6) or interlace:
+                raise ValueError(path + ": only 8-bit RGB/RGBA non-interlaced PNGs are supported")
+            channels = 3 if color_type == 2 else 4
+        elif kind == b"IDAT":
+            idat += body
+        elif kind == b"IEND":
+            break
+    raw = zlib.decompress(bytes(idat))
+    stride = width * channels
+    rows = []
+    prev = bytearray(stride)
+    pos = 0
+    for _ in range(height):
+        ftype = raw[pos]
+        row = bytearray(raw[pos + 1:pos + 1 + stride])
+        pos += 1 + stride
+        _unfilter(ftype, row, prev, channels)
+        rows.append(row)
+        prev = row
+    if channels == 3:
+        return width, height, b"".join(rows)
+    rgb = bytearray()
+    for row in rows:
+        for i in range(0, stride, 4):
+            rgb += row[i:i + 3]
+    return width, height, bytes(rgb)
+
+
+def _unfilter(ftype, row, prev, bpp):
+    n = len(row)
+    if ftype == 0:
+        return
+    if ftype == 1:
+        for i in range(bpp, n):
+            row[i] = (row[i] + row[i - bpp]) & 0xFF
+    elif ftype == 2:
+        for i in range(n):
+            row[i] = (row[i] + prev[i]) & 0xFF
+    elif ftype == 3:
+        for i in range(n):
+            left = row[i - bpp] if i >= bpp else 0
+            row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xFF
+    elif ftype == 4:
+        for i in range(n):
+            a = row[i - bpp] if i >= bpp else 0
+            b = prev[i]
+            c = prev[i - bpp] if i >= bpp else 0
+            p = a + b - c
+            pa = abs(p - a)
+            pb = abs(p - b)
+            pc = abs(p - c)
+            if pa <= pb and pa <= pc:
+                pred = a
+            elif pb <= pc:
+                pred = b
+            else:
+                pred = c
+            row[i] = (row[i] + pred) & 0xFF
+    else:
+        raise ValueError("bad PNG filter type {}".format(ftype))
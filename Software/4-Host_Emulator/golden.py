@@ -0,0 +1,170 @@
+"""Golden-frame regression check for the eyes and mouth drawing code.
+
+    python golden.py              check every scenario against golden/
+    python golden.py --update     re-record golden/ from the current code
+    python golden.py --only eyes-105 --diff-dir /tmp/diff
+
+Each scenario runs a board on the emulator for a few virtual seconds with a
+fixed seed, then compares every panel pixel for pixel with the PNG stored
+in golden/. Eye scenarios are also run with the other render paths
+(framebuffer, DMA pipeline, no broadcast, core 1); all of them must produce
+the golden frames. On a mismatch a diff image is written: expected, actual and
+the differing pixels in red.
+
+SPI time is not charged to the clock here, so a faster or slower render
+path never changes when the firmware does what. Only the pixels on the
+visible disc of the round panels are compared; the corners are blacked out.
+"""
+
+import argparse
+import os
+import sys
+
+from frontman_emu import Emulator, png
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIR = os.path.join(HERE, "golden")
+
+EYES_SECONDS = 6.0
+MOUTH_SECONDS = 2.0
+
+EYES_VARIANTS = {
+    "default": {},
+    "framebuffer": {"RENDER_FRAMEBUFFER": True},
+    "pipeline": {"RENDER_FRAMEBUFFER": True, "RENDER_PIPELINE": True},
+    "framebuffer-no-broadcast": {"RENDER_FRAMEBUFFER": True, "BROADCAST_WRITES": False},
+    "core1": {"RENDER_CORE1": True},
+    "core1-framebuffer": {"RENDER_FRAMEBUFFER": True, "RENDER_CORE1": True},
+}
+
+
+def eyes_scenario(mode, scheme, seed):
+    def run(settings):
+        emu = Emulator(["eyes"], seed=seed, charge_bus_time=False)
+        try:
+            board = emu.board("eyes")
+            board.configure(eyesMode=mode, counter=scheme, **settings)
+            emu.run(EYES_SECONDS)
+            renderer = board.main.renderer
+            if renderer is not None:
+                # Let the core 1 thread draw what was queued before the stop.
+                renderer.stop()
+            return [p.rgb888() for p in board.panels()]
+        finally:
+            emu.close()
+    return run
+
+
+def mouth_scenario(mode, scheme, seed):
+    def run(settings):
+        emu = Emulator(["mouth"], seed=seed, charge_bus_time=False)
+        try:
+            board = emu.board("mouth")
+            board.configure(mouthMode=mode, ColScheme=scheme,
+                            current_color_scheme=board.main.colorSchemes[scheme], **settings)
+            emu.run(MOUTH_SECONDS)
+            return [p.rgb888() for p in board.panels()]
+        finally:
+            emu.close()
+    return run
+
+
+def scenarios():
+    # name -> (run(settings) -> [rgb per panel], variants)
+    found = {}
+    for mode in range(101, 108):
+        scheme = (mode - 101) * 4 + 1
+        found["eyes-{}".format(mode)] = (eyes_scenario(mode, scheme, mode), EYES_VARIANTS)
+    for mode in range(101, 108):
+        scheme = (mode - 101) * 3 + 2
+        found["mouth-{}".format(mode)] = (mouth_scenario(mode, scheme, mode), {"default": {}})
+    return found
+
+
+def visible(rgb, width, height):
+    # Black out the corners the round panel never shows.
+    out = bytearray(rgb)
+    for y in range(height):
+        dy = 2 * y + 1 - height
+        half = int(((width * width - dy * dy) ** 0.5 + 1) / 2)
+        row = y * width * 3
+        out[row:row + (width // 2 - half) * 3] = bytes((width // 2 - half) * 3)
+        out[row + (width // 2 + half) * 3:row + width * 3] = bytes((width // 2 - half) * 3)
+    return bytes(out)
+
+
+def golden_path(name, panel):
+    return os.path.join(GOLDEN_DIR, "{}-{}.png".format(name, panel + 1))
+
+
+def diff_image(expected, actual, width, height):
+    # Expected, actual and a map of the differing pixels side by side.
+    out = bytearray(width * 3 * height * 3)
+    row = width * 3
+    different = 0
+    for y in range(height):
+        o = y * row * 3
+        out[o:o + row] = expected[y * row:(y + 1) * row]
+        out[o + row:o + 2 * row] = actual[y * row:(y + 1) * row]
+        for x in range(width):
+            i = y * row + x * 3
+            d = o + 2 * row + x * 3
+            if expected[i:i + 3] != actual[i:i + 3]:
+                out[d] = 255
+                different += 1
+            else:
+                grey = (expected[i] + expected[i + 1] + expected[i + 2]) // 9
+                out[d] = out[d + 1] = out[d + 2] = grey
+    return out, different
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare emulated frames with the golden images.")
+    parser.add_argument("--update", action="store_true", help="re-record the golden images")
+    parser.add_argument("--only", help="run only scenarios whose name contains this text")
+    parser.add_argument("--diff-dir", default="golden-diff", help="where to write diff images")
+    args = parser.parse_args()
+
+    failures = 0
+    for name, (run, variants) in scenarios().items():
+        if args.only and args.only not in name:
+            continue
+        if args.update:
+            os.makedirs(GOLDEN_DIR, exist_ok=True)
+            for panel, rgb in enumerate(run(variants["default"])):
+                png.write(golden_path(name, panel), 240, 240, visible(rgb, 240, 240))
+            print("{}: recorded".format(name))
+            continue
+        for variant, settings in variants.items():
+            frames = run(settings)
+            problems = []
+            for panel, rgb in enumerate(frames):
+                rgb = visible(rgb, 240, 240)
+                path = golden_path(name, panel)
+                if not os.path.exists(path):
+                    problems.append("no golden image {}".format(os.path.relpath(path, HERE)))
+                    continue
+                width, height, expected = png.read(path)
+                expected = visible(expected, width, height)
+                if expected == bytes(rgb):
+                    continue
+                image, different = diff_image(expected, rgb, width, height)
+                os.makedirs(args.diff_dir, exist_ok=True)
+                out = os.path.join(args.diff_dir, "{}-{}-{}.png".format(name, variant, panel + 1))
+                png.write(out, width * 3, height, image)
+                problems.append("panel {}: {} pixels differ, see {}".format(panel + 1, different, out))
+            if problems:
+                failures += 1
+                print("{} [{}]: FAIL".format(name, variant))
+                for p in problems:
+                    print("  " + p)
+            else:
+                print("{} [{}]: ok".format(name, variant))
+
+    if failures:
+        print("{} failed".format(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()